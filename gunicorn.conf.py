@@ -0,0 +1,32 @@
+# gunicorn.conf.py - production serving: gunicorn -c gunicorn.conf.py
+import multiprocessing
+import os
+import time
+
+# Third-party imports are most of a worker's start-up time (dash + pandas: ~1.5 s). Importing them
+# once in the master means every forked worker starts with them loaded; the app itself (model
+# bundle, log connections, batcher thread) is still created inside each worker.
+import dash  # noqa: F401
+import numpy  # noqa: F401
+import pandas  # noqa: F401
+
+wsgi_app = "app:server"
+pythonpath = "scripts"
+bind = os.environ.get("BIND", "0.0.0.0:8050")
+
+# One worker per core; each worker loads its own model + in-memory indexes
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 4))
+
+# Workers must import the app themselves: SQLite connections and the scoring
+# batcher thread do not survive a fork from a preloaded master
+preload_app = False
+
+
+def post_fork(server, worker):
+    worker.boot_started = time.monotonic()
+
+
+def post_worker_init(worker):
+    worker.log.info("Worker %s ready in %.2fs", worker.pid, time.monotonic() - worker.boot_started)
@@ -0,0 +1,383 @@
+# scripts/alerts.py
+import argparse
+import json
+import math
+import os
+import queue
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+from log_follower import LogFollower
+from session_log import open_session_log
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+ALERTS_PATH = os.path.join("data", "alerts.ndjson")
+_EPOCH = datetime(1970, 1, 1)
+
+# Rules used when no --rules / ALERT_RULES file is given
+DEFAULT_RULES = [
+    {"type": "transition", "name": "medium_to_high_1h", "from": "Medium", "to": "High", "within": "1h"},
+    {"type": "transition", "name": "low_to_high_6h", "from": "Low", "to": "High", "within": "6h"},
+    {"type": "trend", "name": "rising_score", "metric": "slope", "above": 1.0, "min_readings": 3},
+    {"type": "silence", "name": "remote_silent_12h", "source": "Remote", "after": "12h"},
+]
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value):
+    # Seconds from 90, "90s", "30m", "1h" or "2d"
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    if value and value[-1] in _UNITS:
+        return float(value[:-1]) * _UNITS[value[-1]]
+    return float(value)
+
+
+def epoch(timestamp):
+    # Session-log timestamps are naive local times; compared only with each other and datetime.now()
+    return (datetime.fromisoformat(timestamp) - _EPOCH).total_seconds()
+
+
+class PatientState:
+    """Rolling state of one patient, updated in O(1) per reading.
+
+    Keeps the last K readings in a flat ring plus running sums over them, so the least-squares
+    slope (score points per hour) needs no pass over the window; the EWMA covers the whole history.
+    """
+
+    __slots__ = ("pid", "source", "ring", "n", "head", "origin", "st", "ss", "stt", "sts",
+                 "ewma", "score", "risk", "last", "seen", "count")
+
+    def __init__(self, pid, k):
+        self.pid = pid
+        self.source = None
+        # (hours since origin, score) pairs of the last K readings; `head` is the oldest once full
+        self.ring = array("d", bytes(16 * k))
+        self.n = self.head = 0
+        self.origin = None
+        self.st = self.ss = self.stt = self.sts = 0.0
+        self.ewma = self.score = self.risk = None
+        self.last = -math.inf
+        self.seen = {}  # risk level -> time of the latest reading at that level
+        self.count = 0
+
+    def update(self, t, score, risk, source, alpha):
+        if self.origin is None:
+            self.origin = t
+        h = (t - self.origin) / 3600
+        ring, i = self.ring, 2 * self.head
+        if self.n * 2 == len(ring):
+            old_h, old_score = ring[i], ring[i + 1]
+            self.st -= old_h
+            self.ss -= old_score
+            self.stt -= old_h * old_h
+            self.sts -= old_h * old_score
+        else:
+            i = 2 * self.n
+            self.n += 1
+        ring[i], ring[i + 1] = h, score
+        if self.n * 2 == len(ring):
+            self.head = (i // 2 + 1) % self.n
+        self.st += h
+        self.ss += score
+        self.stt += h * h
+        self.sts += h * score
+        self.ewma = score if self.ewma is None else alpha * score + (1 - alpha) * self.ewma
+        self.score, self.risk, self.source, self.last = score, risk, source, t
+        self.seen[risk] = t
+        self.count += 1
+
+    def slope(self):
+        # Least-squares slope of the last K readings, in score points per hour (None below 2 readings)
+        n = self.n
+        if n < 2:
+            return None
+        var = n * self.stt - self.st * self.st
+        return (n * self.sts - self.st * self.ss) / var if var > 1e-12 else None
+
+    def scores(self):
+        # The last K scores, oldest first
+        order = [(self.head + j) % self.n for j in range(self.n)] if self.n * 2 == len(self.ring) else range(self.n)
+        return [self.ring[2 * j + 1] for j in order]
+
+
+# --- Rules: check() runs on every reading; it sees the state after the update and `before` it ---
+class TransitionRule:
+    """Risk moved to `to` while the patient was at `from` within the last `within` seconds."""
+
+    def __init__(self, name, frm, to, within, source=None):
+        self.name, self.frm, self.to, self.within, self.source = name, frm, to, within, source
+
+    def check(self, state, before):
+        if state.risk != self.to or before[0] == self.to or (self.source and state.source != self.source):
+            return None
+        was = state.seen.get(self.frm)
+        if was is None or state.last - was > self.within:
+            return None
+        return f"{self.frm} → {self.to} within {(state.last - was) / 60:.0f} min"
+
+
+class TrendRule:
+    """`metric` (score, ewma or slope) crossed above `above`, after at least `min_readings` readings."""
+
+    def __init__(self, name, metric, above, min_readings=1, source=None):
+        if metric not in ("score", "ewma", "slope"):
+            raise ValueError(f"❌ Unknown trend metric: {metric}")
+        self.name, self.metric, self.above = name, metric, above
+        self.min_readings, self.source = min_readings, source
+
+    def value(self, state):
+        return state.slope() if self.metric == "slope" else getattr(state, self.metric)
+
+    def check(self, state, before):
+        if state.count < self.min_readings or (self.source and state.source != self.source):
+            return None
+        now = self.value(state)
+        if now is None or now <= self.above:
+            return None
+        was = before[{"score": 1, "ewma": 2, "slope": 3}[self.metric]]
+        if was is not None and was > self.above and state.count > self.min_readings:
+            return None
+        unit = " per hour" if self.metric == "slope" else ""
+        return f"{self.metric} {now:.2f}{unit} above {self.above:g}"
+
+
+class SilenceRule:
+    """No reading from `source` for `after` seconds; fires once per gap.
+
+    Patients are kept in an OrderedDict in the order of their latest reading, so tick() only
+    looks at the front: the patients that have been silent the longest.
+    """
+
+    def __init__(self, name, after, source=None):
+        self.name, self.after, self.source = name, after, source
+        self.watch = OrderedDict()  # pid -> time of the latest matching reading
+
+    def seen(self, state):
+        if self.source and state.source != self.source:
+            return
+        self.watch.pop(state.pid, None)
+        self.watch[state.pid] = state.last
+
+    def expired(self, now):
+        while self.watch:
+            pid, t = next(iter(self.watch.items()))
+            if now - t < self.after:
+                return
+            self.watch.popitem(last=False)
+            yield pid, f"no {self.source or 'new'} reading for {(now - t) / 3600:.1f} h"
+
+
+def build_rules(specs):
+    rules = []
+    for spec in specs:
+        kind, name = spec.get("type"), spec.get("name") or spec.get("type")
+        if kind == "transition":
+            rules.append(TransitionRule(name, spec["from"], spec["to"], parse_duration(spec["within"]), spec.get("source")))
+        elif kind == "trend":
+            rules.append(TrendRule(name, spec["metric"], float(spec["above"]), int(spec.get("min_readings", 1)), spec.get("source")))
+        elif kind == "silence":
+            rules.append(SilenceRule(name, parse_duration(spec["after"]), spec.get("source")))
+        else:
+            raise ValueError(f"❌ Unknown alert rule type: {kind}")
+    return rules
+
+
+def load_rules(path=None):
+    # JSON list of rule specs (same shape as DEFAULT_RULES); None means the defaults
+    if path is None:
+        return build_rules(DEFAULT_RULES)
+    with open(path) as f:
+        return build_rules(json.load(f))
+
+
+# --- Sinks: callables that receive each alert (a dict) ---
+class FileSink:
+    """Appends alerts to an NDJSON file."""
+
+    def __init__(self, path=ALERTS_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+
+    def __call__(self, alert):
+        self._f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+
+class QueueSink:
+    """Hands alerts to a consumer thread through a bounded queue; drops (and counts) them when it is full."""
+
+    def __init__(self, maxsize=10_000):
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+
+    def __call__(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RecentAlerts:
+    """The last `maxlen` alerts, for the dashboard; `total` tells a page whether anything is new."""
+
+    def __init__(self, maxlen=200):
+        self._alerts = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def __call__(self, alert):
+        with self._lock:
+            self._alerts.append(alert)
+            self.total += 1
+
+    def latest(self, n=20):
+        # Newest first
+        with self._lock:
+            return list(self._alerts)[-n:][::-1]
+
+
+class AlertEngine:
+    """Evaluates alert rules on every logged score, keeping O(1) rolling state per patient.
+
+    Used as a LogFollower index: add(row) is called once per session-log row. Readings older
+    than a patient's latest one are counted in `late` and skipped, since they would rewrite
+    the rolling state. Silence rules are time-driven and are evaluated by tick().
+    """
+
+    def __init__(self, rules, sinks=(), k=10, alpha=0.3):
+        self.rules = [r for r in rules if not isinstance(r, SilenceRule)]
+        self.silence = [r for r in rules if isinstance(r, SilenceRule)]
+        self.sinks = list(sinks)
+        self.k, self.alpha = k, alpha
+        self.quiet = False
+        self.readings = self.late = self.fired = 0
+        self._patients = {}
+        self._lock = threading.Lock()
+
+    def _emit(self, rule, state, message, timestamp):
+        alert = {"Timestamp": timestamp, "PatientID": state.pid, "Source": state.source, "Rule": rule.name,
+                 "Message": message, "Score": state.score, "Risk": state.risk,
+                 "EWMA": round(state.ewma, 3), "Slope": None if state.slope() is None else round(state.slope(), 3)}
+        self.fired += 1
+        for sink in self.sinks:
+            sink(alert)
+
+    def add(self, row):
+        pid = str(row["PatientID"])
+        t = epoch(row["Timestamp"])
+        with self._lock:
+            state = self._patients.get(pid)
+            if state is None:
+                state = self._patients[pid] = PatientState(pid, self.k)
+            elif t < state.last:
+                self.late += 1
+                return
+            before = (state.risk, state.score, state.ewma, state.slope())
+            state.update(t, float(row["Score"]), row["Risk"], row.get("Source"), self.alpha)
+            self.readings += 1
+            for rule in self.silence:
+                rule.seen(state)
+            if self.quiet:
+                return
+            for rule in self.rules:
+                message = rule.check(state, before)
+                if message:
+                    self._emit(rule, state, message, row["Timestamp"])
+
+    def load(self, rows):
+        # Warm-up: builds state from past rows (in time order) without raising alerts for them
+        self.quiet = True
+        try:
+            for row in rows:
+                self.add(row)
+        finally:
+            self.quiet = False
+        return self
+
+    def tick(self, now=None):
+        # Evaluates the silence rules; cost is proportional to the alerts raised
+        now = now or datetime.now()
+        t = (now - _EPOCH).total_seconds()
+        with self._lock:
+            for rule in self.silence:
+                for pid, message in rule.expired(t):
+                    self._emit(rule, self._patients[pid], message, now.strftime(TIMESTAMP_FORMAT))
+
+    def horizon(self):
+        # Seconds of history the time-based rules look back over: what a warm-up must replay
+        windows = [r.within for r in self.rules if isinstance(r, TransitionRule)] + [r.after for r in self.silence]
+        return max(windows, default=0)
+
+    def patients(self):
+        return len(self._patients)
+
+    def state(self, pid):
+        return self._patients.get(str(pid))
+
+
+class AlertTicker:
+    """Background thread that keeps an engine current whether or not anyone is looking.
+
+    Every `interval` seconds it syncs the follower (new rows reach the transition and trend
+    rules) and calls tick() (silence rules). A failed round is reported and retried on the next.
+    """
+
+    def __init__(self, follower, engine, interval=1.0):
+        self.follower = follower
+        self.engine = engine
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="alert-ticker", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.follower.sync(force=True)
+                self.engine.tick()
+            except Exception as exc:
+                print(f"⚠️ Alert tick failed: {exc}", flush=True)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Follow the session log and raise per-patient deterioration alerts.")
+    parser.add_argument("--rules", default=os.environ.get("ALERT_RULES"), help="JSON file of rule specs (default: built-in rules)")
+    parser.add_argument("--output", default=ALERTS_PATH, help="NDJSON file alerts are appended to")
+    parser.add_argument("--warmup", default="12h", help="History replayed (without alerting) to build state at start-up")
+    parser.add_argument("--window", type=int, default=10, help="Readings kept per patient for the slope (K)")
+    parser.add_argument("--alpha", type=float, default=0.3, help="EWMA smoothing factor")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between log polls and silence checks")
+    parser.add_argument("--quiet", action="store_true", help="Do not print alerts to stdout")
+    args = parser.parse_args()
+
+    sinks = [FileSink(args.output)]
+    if not args.quiet:
+        sinks.append(lambda a: print(f"🚨 {a['Timestamp']} {a['PatientID']} ({a['Source']}) {a['Rule']}: {a['Message']}", flush=True))
+    engine = AlertEngine(load_rules(args.rules), sinks, k=args.window, alpha=args.alpha)
+    session_log = open_session_log()
+    cursor = session_log.cursor()
+    since = (datetime.now() - timedelta(seconds=parse_duration(args.warmup))).strftime(TIMESTAMP_FORMAT)
+    start = time.perf_counter()
+    engine.load(session_log.since(since, upto=cursor).to_dict("records"))
+    print(f"✅ Warmed up on {engine.readings} readings ({engine.patients()} patients) in {time.perf_counter() - start:.1f}s; "
+          f"alerts go to {args.output}", flush=True)
+
+    follower = LogFollower(session_log, [engine], cursor)
+    try:
+        while True:
+            follower.sync(force=True)
+            engine.tick()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
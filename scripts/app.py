@@ -1,24 +1,90 @@
 # app.py
 import dash
-from dash import html, dcc, Input, Output, State, dash_table
-import pandas as pd
-import numpy as np
-import joblib
+from dash import html, dcc, Input, Output, State, Patch, dash_table
+from dash.exceptions import PreventUpdate
 import os
+from collections import Counter
 from datetime import datetime, timedelta
-import plotly.express as px
+from session_log import COLUMNS, open_session_log
+from model_bundle import active_bundle
+from scoring import load_kernel, score_one
+from recent_scores import MINUTE_FORMAT, RecentScores
+from risk_counters import RISK_LEVELS, DailyRiskCounters
+from patient_trends import PatientTrendCache
+from log_follower import LogFollower
+from alerts import TIMESTAMP_FORMAT, AlertEngine, AlertTicker, RecentAlerts, load_rules
+from table_query import parse_filter_query, parse_sort_by
+from score_api import MicroBatcher, register_score_api
+from metrics import instrument_log, instrument_server, phase
 
-# Load model components
-scaler = joblib.load("models/scaler.pkl")
-features = joblib.load("models/scoring_features.pkl")
+# Load model components up front: a missing or mismatched artifact fails here, not mid-request
+bundle = active_bundle()
+kernel = load_kernel()
 
-# Session score file
-LOG_FILE = "data/session_scores.csv"
-if not os.path.exists(LOG_FILE):
-    pd.DataFrame(columns=["PatientID", "Timestamp", "Score", "Risk", "Source"]).to_csv(LOG_FILE, index=False)
+# Session score log (SQLite by default, SESSION_LOG_BACKEND=csv for the legacy file);
+# reads and writes are timed and counted for /metrics unless METRICS_ENABLED=0
+session_log = instrument_log(open_session_log())
+
+# In-memory indexes are loaded up to this point of the log's change feed, then follow it
+log_cursor = session_log.cursor()
+
+# In-memory windows behind the In-Person (2h) and Remote (6h) pages; the extra hour keeps rows
+# that just left a window around long enough for live pages to count them out
+recent_scores = RecentScores(horizon=timedelta(hours=7)).load(session_log, upto=log_cursor)
+
+# Today's Low/Medium/High counts behind the home-page summary
+risk_counters = DailyRiskCounters().load(session_log, upto=log_cursor)
+
+# Per-patient score series for the calculator's trend chart (LRU, bounded by total points)
+patient_trends = PatientTrendCache(
+    session_log,
+    max_points=int(os.environ.get("TREND_CACHE_POINTS", 200_000)),
+    display_points=int(os.environ.get("TREND_DISPLAY_POINTS", 500)),
+    upto=log_cursor,
+)
+
+# Per-patient deterioration alerts behind the home page (rules: ALERT_RULES JSON file, else the
+# defaults). State is warmed, without alerting, from the log over the longest rule window.
+recent_alerts = RecentAlerts()
+alert_engine = AlertEngine(load_rules(os.environ.get("ALERT_RULES")), [recent_alerts])
+alert_engine.load(session_log.since(
+    (datetime.now() - timedelta(seconds=alert_engine.horizon())).strftime(TIMESTAMP_FORMAT), upto=log_cursor,
+).to_dict("records"))
+
+# Keeps the indexes coherent with rows written by other workers / the ingest service
+log_follower = LogFollower(
+    session_log, [recent_scores, risk_counters, patient_trends, alert_engine], log_cursor,
+    min_interval=float(os.environ.get("SESSION_SYNC_INTERVAL", 0.5)),
+)
+
+# Alerts are raised in the background (ALERT_TICK_INTERVAL seconds, 0 = only when the home page refreshes)
+alert_tick_interval = float(os.environ.get("ALERT_TICK_INTERVAL", 1.0))
+alert_ticker = AlertTicker(log_follower, alert_engine, alert_tick_interval) if alert_tick_interval > 0 else None
+
+
+def log_score(row):
+    # Single write path: persist the score, then catch the in-process indexes up with the log
+    session_log.append(row)
+    log_follower.sync(force=True)
+
+
+def log_scores(rows):
+    # Bulk twin of log_score: one write (one transaction) for a whole batch
+    session_log.append_many(rows)
+    log_follower.sync(force=True)
 
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 app.title = "Hospital Risk Intelligence"
+# WSGI entry point for multi-worker serving (see gunicorn.conf.py)
+server = app.server
+
+# JSON scoring endpoint for device integrations: concurrent requests are scored in micro-batches
+score_batcher = MicroBatcher(
+    kernel, log_scores,
+    max_batch=int(os.environ.get("SCORE_BATCH_SIZE", 256)),
+    max_wait_ms=float(os.environ.get("SCORE_BATCH_WAIT_MS", 2)),
+)
+register_score_api(server, score_batcher)
 
 app.layout = html.Div([
     dcc.Location(id='url'),
@@ -80,7 +146,15 @@ def home_page():
                 "color": "#004080",
                 "textAlign": "center"
             }),
-            dcc.Graph(id="risk-summary-chart", style={"padding": "0 40px"})
+            dcc.Graph(id="risk-summary-chart", style={"padding": "0 40px"}),
+            html.H4("🚨 Recent Alerts", style={
+                "marginTop": "30px",
+                "color": "#004080",
+                "textAlign": "center"
+            }),
+            html.Div(id="alerts-panel", style={"padding": "0 40px"}),
+            dcc.Store(id="alerts-seen"),
+            dcc.Interval(id="alerts-live", interval=max(LIVE_REFRESH_MS, 1000), disabled=LIVE_REFRESH_MS <= 0)
         ], style={
             "padding": "30px",
             "margin": "20px auto",
@@ -191,16 +265,19 @@ def table_page(title, source_filter):
         navbar,
         html.H3(title),
         html.P(f"Displaying patients with source = {source_filter}"),
-        dcc.Loading(html.Div(id=f"{source_filter.lower()}-table")),
+        # Spinner for the first render only: live updates and paging refresh the table in place
+        dcc.Loading(html.Div(id=f"{source_filter.lower()}-table"),
+                    target_components={f"{source_filter.lower()}-table": "children"}),
         dcc.Graph(id=f"{source_filter.lower()}-trend")
     ])
 
 @app.callback(Output("page-content", "children"), Input("url", "pathname"))
 def route(path):
-    if path == "/calculator": return calculator_page()
-    elif path == "/InPerson": return table_page("🩺 In Person Data", "InPerson")
-    elif path == "/remote": return table_page("📡 Remote Monitoring", "Remote")
-    return home_page()
+    with phase("layout"):
+        if path == "/calculator": return calculator_page()
+        elif path == "/InPerson": return table_page("🩺 In Person Data", "InPerson")
+        elif path == "/remote": return table_page("📡 Remote Monitoring", "Remote")
+        return home_page()
 
 @app.callback(
     Output("prediction-output", "children"),
@@ -215,64 +292,70 @@ def calculate_score(n, pid, h, w, dbp, sbp, hr, rr, smoke, source):
     if n == 0 or None in [pid, h, w, dbp, sbp, hr, rr, smoke, source]:
         return "⚠️ Please enter all values.", {}
 
-    # ✅ Updated logic with physiological safeguards
-    bmi = w / ((h / 100) ** 2)
-    pp = abs(sbp - dbp)
-    phr = max(pp * hr, 0)
-    ratio = max(sbp / dbp, 0.01)
-    hrxrr = hr * rr
-    hs = hr / bmi
-    sc = {"NO": 0, "EX": 1, "YES": 2}[smoke]
-    sbmi = sc * bmi
-    bps = ratio * sc
-    bcat = 1 if bmi >= 25 else 0
-
-    df = pd.DataFrame([{
-        "Body Height": h, "Body Weight": w, "Diastolic Blood Pressure": dbp,
-        "Systolic Blood Pressure": sbp, "Heart rate": hr, "Respiratory rate": rr,
-        "BMI": bmi, "Pulse_Pressure": pp, "BP_Ratio": ratio, "HRxRR": hrxrr,
-        "HeartStress": hs, "SmokingBMI": sbmi, "Pulse_HR": phr,
-        "BP_Smoking": bps
-    }])
-    scaled = scaler.transform(df)
-    v = dict(zip(df.columns, scaled[0]))
-    v['Smoking_encoded'] = sc
-    v['BMI_Category_Overweight'] = bcat
-
-    score = round(sum([
-        0.141 * v['SmokingBMI'], 0.138 * v['Smoking_encoded'], 0.112 * v['BP_Smoking'],
-        0.110 * v['Body Height'], 0.099 * v['Body Weight'], 0.084 * v['BMI'],
-        0.083 * v['Systolic Blood Pressure'], 0.079 * v['HeartStress'],
-        0.077 * v['Respiratory rate'], 0.077 * v['BMI_Category_Overweight']
-    ]), 2)
-    risk = "Low" if score <= 2.5 else "Medium" if score <= 4.0 else "High"
+    # ✅ Updated logic with physiological safeguards (shared with the bulk scorer)
+    with phase("score"):
+        score, risk = score_one(h, w, dbp, sbp, hr, rr, smoke, kernel)
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log = pd.read_csv(LOG_FILE)
-    new_row = pd.DataFrame([{
+    log_score({
         "PatientID": pid, "Timestamp": now,
         "Score": score, "Risk": risk, "Source": source
-    }])
-    log = pd.concat([log, new_row], ignore_index=True)
-    log.to_csv(LOG_FILE, index=False)
+    })
 
-    patient_log = log[log.PatientID == pid]
-    fig = px.line(patient_log, x="Timestamp", y="Score", title=f"Trend for {pid}", markers=True)
+    ts, scores = patient_trends.trend(pid)
+    with phase("figure"):
+        import plotly.express as px  # loaded on first use, off the startup path
+        fig = px.line(x=ts, y=scores, labels={"x": "Timestamp", "y": "Score"}, title=f"Trend for {pid}", markers=True)
 
     return [
         html.H4(f"🧮 Calculated Score: {score}"),
         html.H4(f"⚠️ Health Risk Level: {risk}")
     ], fig
 
-@app.callback(Output("inperson-table", "children"), Output("inperson-trend", "figure"), Input("url", "pathname"))
-def traige_scores(path):
-    if path != "/InPerson": return dash.no_update, dash.no_update
-    df = pd.read_csv(LOG_FILE)
-    df = df[df.Source == "InPerson"]
-    recent = df[df["Timestamp"] >= (datetime.now() - timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")]
-    table = dash_table.DataTable(
-        columns=[{"name": i, "id": i} for i in df.columns],
-        data=recent.to_dict("records"),
+# Window shown on each monitoring page, in hours
+WINDOW_HOURS = {"InPerson": 2, "Remote": 6}
+PAGE_SIZE = 25
+CHART_TITLES = {"InPerson": "InPerson data Risk Summary", "Remote": "Remote Monitoring Risk Summary"}
+
+# Live mode: monitoring pages poll every LIVE_REFRESH_MS (0 = off) and only receive what changed
+LIVE_REFRESH_MS = int(os.environ.get("LIVE_REFRESH_MS", 5000))
+
+RISK_COLORS = {
+    "Low": "#28a745",     # ✅ Green
+    "Medium": "#ffc107",  # ⚠️ Yellow
+    "High": "#dc3545"     # 🔴 Red
+}
+
+
+def risk_bar(counts, title):
+    # Bar chart of pre-aggregated Low/Medium/High counts (levels with no rows are left out)
+    with phase("figure"):
+        import plotly.express as px
+        levels = [r for r in RISK_LEVELS if counts.get(r)]
+        return px.bar(
+            {"Risk": levels, "count": [counts[r] for r in levels]},
+            x="Risk",
+            y="count",
+            color="Risk",
+            color_discrete_map=RISK_COLORS,
+            title=title
+        )
+
+
+def score_table(source_filter):
+    # Paging, sorting and filtering run on the server; the browser only receives one page
+    return dash_table.DataTable(
+        id=f"{source_filter.lower()}-datatable",
+        columns=[{"name": i, "id": i, "type": "numeric" if i == "Score" else "text"} for i in COLUMNS],
+        data=[],
+        page_action="custom",
+        page_current=0,
+        page_size=PAGE_SIZE,
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
         style_cell={"textAlign": "center"},
         style_data_conditional=[
             {"if": {"filter_query": '{Risk} = "High"'}, "backgroundColor": "#f8d7da"},
@@ -280,63 +363,191 @@ def traige_scores(path):
             {"if": {"filter_query": '{Risk} = "Low"'}, "backgroundColor": "#d4edda"}
         ]
     )
-    # return table, px.histogram(recent, x="Risk", color="Risk", title="")
-    return table, px.histogram(
-    recent, 
-    x="Risk", 
-    color="Risk", 
-    color_discrete_map={
-        "Low": "#28a745",     # ✅ Green
-        "Medium": "#ffc107",  # ⚠️ Yellow
-        "High": "#dc3545"     # 🔴 Red
-    },
-    title="InPerson data Risk Summary")
+
+
+def table_page_data(source_filter, page_current, page_size, sort_by, filter_query):
+    since = (datetime.now() - timedelta(hours=WINDOW_HOURS[source_filter])).strftime("%Y-%m-%d %H:%M")
+    filters = parse_filter_query(filter_query)
+    total = session_log.count(source=source_filter, since=since, filters=filters)
+    page = session_log.page(
+        source=source_filter, since=since, filters=filters, sort=parse_sort_by(sort_by),
+        offset=page_current * page_size, limit=page_size
+    )
+    return page.to_dict("records"), max(1, -(-total // page_size))
+
+
+def window_cutoff(source_filter, now):
+    return (now - timedelta(hours=WINDOW_HOURS[source_filter])).strftime(MINUTE_FORMAT)
+
+
+def window_snapshot(source_filter, now=None):
+    # Risk counts of the page window, with the log cursor and cut-off they reflect (a page's live state)
+    log_follower.sync()
+    now = now or datetime.now()
+    with log_follower.pinned() as cursor, phase("aggregate"):
+        rows = recent_scores.window(source_filter, hours=WINDOW_HOURS[source_filter], now=now)
+        counts = Counter(r["Risk"] for r in rows)
+    return {"cursor": cursor, "cutoff": window_cutoff(source_filter, now), "counts": dict(counts)}
+
+
+def window_delta(source_filter, state, now=None):
+    """Moves a page's live state forward to the current log cursor and window.
+
+    Returns (new state, rows of this source that entered or left the window). An idle window
+    costs one cursor comparison and returns (state, 0). (None, None) means the delta cannot be
+    derived here, e.g. the page was rendered before this worker started, and the caller falls
+    back to window_snapshot().
+    """
+    log_follower.sync()
+    now = now or datetime.now()
+    cutoff = window_cutoff(source_filter, now)
+    if state["cursor"] == log_follower.cursor and state["cutoff"] == cutoff:
+        return state, 0
+    if state["cursor"] > log_follower.cursor:
+        # Rendered by a worker that has seen more of the log than this one
+        log_follower.sync(force=True)
+    with log_follower.pinned() as cursor, phase("aggregate"):
+        expired = recent_scores.between(source_filter, state["cutoff"], cutoff)
+        if expired is None or not log_follower.start <= state["cursor"] <= cursor:
+            return None, None
+        counts, touched = Counter(state["counts"]), 0
+        # Rows the page counted whose timestamps have now fallen out of the window
+        for row in expired:
+            if row.get("id", 0) <= state["cursor"]:
+                counts[row["Risk"]] -= 1
+                touched += 1
+        # Rows logged since the page's cursor (by any worker or the ingest service)
+        for row in recent_scores.arrived(source_filter, state["cursor"], cursor):
+            if row["Timestamp"] >= cutoff:
+                counts[row["Risk"]] += 1
+                touched += 1
+    return {"cursor": cursor, "cutoff": cutoff, "counts": {k: n for k, n in counts.items() if n}}, touched
+
+
+def live_table(source_filter, state):
+    # Server-paged table plus the page's live state and refresh timer
+    key = source_filter.lower()
+    return [
+        score_table(source_filter),
+        dcc.Store(id=f"{key}-live-state", data=state),
+        dcc.Interval(id=f"{key}-live", interval=max(LIVE_REFRESH_MS, 1000), disabled=LIVE_REFRESH_MS <= 0),
+    ]
+
+
+def live_update(source_filter, state, page_current, page_size, sort_by, filter_query):
+    # One live tick: no response body while idle, otherwise patched counts and the visible page
+    new, touched = window_delta(source_filter, state)
+    if new is state:
+        raise PreventUpdate
+    if new is None:
+        new = window_snapshot(source_filter)
+    elif not touched:
+        return new, dash.no_update, dash.no_update, dash.no_update
+
+    levels = [r for r in RISK_LEVELS if new["counts"].get(r)]
+    if levels == [r for r in RISK_LEVELS if state["counts"].get(r)]:
+        # Same bars as on screen: update their heights in place
+        figure = Patch()
+        for i, level in enumerate(levels):
+            figure["data"][i]["y"] = [new["counts"][level]]
+    else:
+        figure = risk_bar(new["counts"], CHART_TITLES[source_filter])
+    data, page_count = table_page_data(source_filter, page_current, page_size, sort_by, filter_query)
+    return new, figure, data, page_count
+
+
+@app.callback(Output("inperson-table", "children"), Output("inperson-trend", "figure"), Input("url", "pathname"))
+def traige_scores(path):
+    if path != "/InPerson": return dash.no_update, dash.no_update
+    state = window_snapshot("InPerson")
+    with phase("layout"):
+        table = live_table("InPerson", state)
+    return table, risk_bar(state["counts"], CHART_TITLES["InPerson"])
+
+@app.callback(
+    Output("inperson-datatable", "data"), Output("inperson-datatable", "page_count"),
+    Input("inperson-datatable", "page_current"), Input("inperson-datatable", "page_size"),
+    Input("inperson-datatable", "sort_by"), Input("inperson-datatable", "filter_query")
+)
+def traige_page(page_current, page_size, sort_by, filter_query):
+    return table_page_data("InPerson", page_current, page_size, sort_by, filter_query)
+
+@app.callback(
+    Output("inperson-live-state", "data"), Output("inperson-trend", "figure", allow_duplicate=True),
+    Output("inperson-datatable", "data", allow_duplicate=True),
+    Output("inperson-datatable", "page_count", allow_duplicate=True),
+    Input("inperson-live", "n_intervals"), State("inperson-live-state", "data"),
+    State("inperson-datatable", "page_current"), State("inperson-datatable", "page_size"),
+    State("inperson-datatable", "sort_by"), State("inperson-datatable", "filter_query"),
+    prevent_initial_call=True
+)
+def traige_live(n, state, page_current, page_size, sort_by, filter_query):
+    return live_update("InPerson", state, page_current, page_size, sort_by, filter_query)
 
 @app.callback(Output("remote-table", "children"), Output("remote-trend", "figure"), Input("url", "pathname"))
 def remote_scores(path):
     if path != "/remote": return dash.no_update, dash.no_update
-    df = pd.read_csv(LOG_FILE)
-    df = df[df.Source == "Remote"]
-    recent = df[df["Timestamp"] >= (datetime.now() - timedelta(hours=6)).strftime("%Y-%m-%d %H:%M")]
-    table = dash_table.DataTable(
-        columns=[{"name": i, "id": i} for i in df.columns],
-        data=recent.to_dict("records"),
-        style_cell={"textAlign": "center"},
-        style_data_conditional=[
-            {"if": {"filter_query": '{Risk} = "High"'}, "backgroundColor": "#f8d7da"},
-            {"if": {"filter_query": '{Risk} = "Medium"'}, "backgroundColor": "#fff3cd"},
-            {"if": {"filter_query": '{Risk} = "Low"'}, "backgroundColor": "#d4edda"}
-        ]
-    )
-    # return table, px.histogram(, x="Risk", color="Risk", title="")
-    return table, px.histogram(
-        recent, 
-        x="Risk", 
-        color="Risk", 
-        color_discrete_map={
-            "Low": "#28a745",     
-            "Medium": "#ffc107",  
-            "High": "#dc3545"  
-        },
-        title="Remote Monitoring Risk Summary"
-    )
+    state = window_snapshot("Remote")
+    with phase("layout"):
+        table = live_table("Remote", state)
+    return table, risk_bar(state["counts"], CHART_TITLES["Remote"])
+
+@app.callback(
+    Output("remote-datatable", "data"), Output("remote-datatable", "page_count"),
+    Input("remote-datatable", "page_current"), Input("remote-datatable", "page_size"),
+    Input("remote-datatable", "sort_by"), Input("remote-datatable", "filter_query")
+)
+def remote_page(page_current, page_size, sort_by, filter_query):
+    return table_page_data("Remote", page_current, page_size, sort_by, filter_query)
+
+@app.callback(
+    Output("remote-live-state", "data"), Output("remote-trend", "figure", allow_duplicate=True),
+    Output("remote-datatable", "data", allow_duplicate=True),
+    Output("remote-datatable", "page_count", allow_duplicate=True),
+    Input("remote-live", "n_intervals"), State("remote-live-state", "data"),
+    State("remote-datatable", "page_current"), State("remote-datatable", "page_size"),
+    State("remote-datatable", "sort_by"), State("remote-datatable", "filter_query"),
+    prevent_initial_call=True
+)
+def remote_live(n, state, page_current, page_size, sort_by, filter_query):
+    return live_update("Remote", state, page_current, page_size, sort_by, filter_query)
 
 @app.callback(Output("risk-summary-chart", "figure"), Input("url", "pathname"))
 def summary_graph(path):
-    df = pd.read_csv(LOG_FILE)
-    today = df[df["Timestamp"].str.startswith(datetime.now().strftime("%Y-%m-%d"))]
-    # return px.histogram(today, x="Risk", color="Risk", title="Today's Risk Summary")
-    return px.histogram(
-        today, 
-        x="Risk", 
-        color="Risk", 
-        color_discrete_map={
-            "Low": "#28a745",     
-            "Medium": "#ffc107",  
-            "High": "#dc3545"     
-        },
-        title="Today's Risk Summary"
-    )
+    log_follower.sync()
+    return risk_bar(risk_counters.counts(), "Today's Risk Summary")
+
+ALERTS_SHOWN = 20
+
+
+def alert_list(alerts):
+    if not alerts:
+        return html.P("No alerts.", style={"textAlign": "center", "color": "#666"})
+    return html.Ul([
+        html.Li([
+            html.Span(f"{a['Timestamp']} · {a['PatientID']} ({a['Source']}) · "),
+            html.B(a["Rule"]),
+            html.Span(f" · {a['Message']}"),
+        ], style={"color": RISK_COLORS["High"] if a["Risk"] == "High" else "#333"})
+        for a in alerts
+    ], style={"fontSize": "15px", "lineHeight": "1.8"})
+
+
+@app.callback(
+    Output("alerts-panel", "children"), Output("alerts-seen", "data"),
+    Input("url", "pathname"), Input("alerts-live", "n_intervals"), State("alerts-seen", "data")
+)
+def alerts_panel(path, n, seen):
+    # Rows reach the engine through the follower; the ticker raises alerts between refreshes too
+    log_follower.sync()
+    alert_engine.tick()
+    if n and seen == recent_alerts.total:
+        raise PreventUpdate
+    with phase("layout"):
+        return alert_list(recent_alerts.latest(ALERTS_SHOWN)), recent_alerts.total
+
+# Per-callback / per-phase latency, rows and payload sizes on /metrics (Prometheus text format)
+instrument_server(server, {output: spec["callback"].__name__ for output, spec in app.callback_map.items()})
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,361 @@
+# scripts/benchmark.py
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join("data", "benchmark_history.json")
+
+SIZES = [1_000, 100_000, 1_000_000]
+BACKENDS = ["sqlite", "csv"]
+PIPELINE_SCALES = [1, 4]
+
+# Metrics whose medians differ by less than this are never reported as changed (timer noise)
+NOISE_FLOOR_MS = 0.05
+
+
+def size_label(n):
+    return f"{n // 1_000_000}M" if n >= 1_000_000 and n % 1_000_000 == 0 else f"{n // 1000}k" if n >= 1000 else str(n)
+
+
+def measure(fn, repeat=20, budget=2.0, warmup=1):
+    """Time fn() up to `repeat` times (at least 3, fewer if it exceeds `budget` seconds); ms stats."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    deadline = time.perf_counter() + budget
+    while len(times) < repeat and (len(times) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+
+def summarize(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {"median_ms": float(np.median(ms)), "p95_ms": float(np.percentile(ms, 95)),
+            "min_ms": float(ms.min()), "n": len(ms)}
+
+
+# --- Synthetic session logs ---
+def synthetic_rows(n, days=30, seed=0, chunk=50_000):
+    """Chunks of session-log rows: n scores spread over the last `days` days, ~50 per patient."""
+    from scoring import classify
+    rng = np.random.default_rng(seed)
+    patients = max(n // 50, 10)
+    start = np.datetime64(datetime.now() - timedelta(days=days), "s")
+    offsets = np.sort(rng.uniform(0, days * 86400, n)).astype("timedelta64[s]")
+    for lo in range(0, n, chunk):
+        m = min(chunk, n - lo)
+        stamps = np.char.replace((start + offsets[lo:lo + m]).astype(str), "T", " ")
+        scores = np.round(rng.normal(3.0, 1.2, m), 2)
+        risks = classify(scores)
+        pids = rng.integers(0, patients, m)
+        sources = rng.choice(["InPerson", "Remote"], m)
+        yield [{"PatientID": f"P{p:06d}", "Timestamp": t, "Score": float(s), "Risk": r, "Source": src}
+               for p, t, s, r, src in zip(pids, stamps, scores, risks, sources)]
+
+
+def build_log(session_log, n, days=30, seed=0):
+    for rows in synthetic_rows(n, days, seed):
+        session_log.append_many(rows)
+
+
+# --- Dash callbacks, driven through the server's dispatch route like a browser would ---
+def split_outputs(key):
+    # (id, property) pairs of a callback's output string, including allow_duplicate suffixes
+    return [tuple(part.split(".", 1)) for part in key.strip(".").split("...")]
+
+
+def dispatch_body(outputs, inputs, state=()):
+    # JSON body of a /_dash-update-component request; inputs and state are (id, property, value)
+    def prop(spec):
+        cid, name = spec[0], spec[1]
+        return {"id": cid, "property": name, **({"value": spec[2]} if len(spec) > 2 else {})}
+
+    return {
+        "output": f"{outputs[0][0]}.{outputs[0][1]}" if len(outputs) == 1
+        else ".." + "...".join(f"{cid}.{name}" for cid, name in outputs) + "..",
+        "outputs": prop(outputs[0]) if len(outputs) == 1 else [prop(o) for o in outputs],
+        "inputs": [prop(i) for i in inputs],
+        "state": [prop(s) for s in state],
+        "changedPropIds": [f"{inputs[0][0]}.{inputs[0][1]}"],
+    }
+
+
+def dispatch(client, outputs, inputs, state=()):
+    body = dispatch_body(outputs, inputs, state)
+    response = client.post("/_dash-update-component", json=body)
+    if response.status_code not in (200, 204):
+        raise RuntimeError(f"{body['output']}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def bench_app(backend, size, log_path, repeat, budget, days, seed):
+    """Runs in a child process: builds the log, imports the app on it and times its hot paths."""
+    os.environ["SESSION_LOG_BACKEND"] = backend
+    os.environ["SESSION_LOG_PATH"] = log_path
+    # The log holds only build_log's rows: never import data/session_scores.csv into it
+    os.environ["SESSION_LOG_MIGRATE"] = ""
+    from session_log import open_session_log
+    from scoring import score_one
+
+    start = time.perf_counter()
+    build_log(open_session_log(), size, days, seed)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    import app
+    results = {"startup.import_app": summarize([time.perf_counter() - start])}
+
+    client = app.server.test_client()
+    vitals = [("height", 172), ("weight", 81), ("dbp", 82), ("sbp", 131), ("hr", 77), ("rr", 16), ("smoke", "NO")]
+    row = {"PatientID": "P000001", "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+           "Score": 3.1, "Risk": "Medium", "Source": "Remote"}
+
+    def url(path):
+        return [("url", "pathname", path)]
+
+    def page(table, sort_by, filter_query):
+        return [(table, "page_current", 0), (table, "page_size", app.PAGE_SIZE),
+                (table, "sort_by", sort_by), (table, "filter_query", filter_query)]
+
+    def outputs_of(callback):
+        return split_outputs(next(k for k, spec in app.app.callback_map.items() if spec["callback"].__name__ == callback))
+
+    live = {}
+
+    def live_idle():
+        # Taken on the warm-up call, after the cases above have written their rows
+        if not live:
+            app.log_follower.sync(force=True)
+            live["state"] = app.window_snapshot("InPerson")
+        return dispatch(client, outputs_of("traige_live"), [("inperson-live", "n_intervals", 1)],
+                        [("inperson-live-state", "data", live["state"])] + page("inperson-datatable", [], ""))
+
+    # 1k-reading batches from 50k remote patients, in time order (measure() makes at most max(repeat, 3) + 1 calls)
+    from alerts import AlertEngine, load_rules
+    engine = AlertEngine(load_rules())
+    rng = np.random.default_rng(seed)
+    start_at = datetime.now()
+    batches = iter([[{"PatientID": f"R{p:05d}", "Timestamp": (start_at + timedelta(minutes=b, milliseconds=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                      "Score": float(s), "Risk": "Low" if s <= 2.5 else "Medium" if s <= 4 else "High", "Source": "Remote"}
+                     for i, (p, s) in enumerate(zip(rng.integers(0, 50_000, 1000), np.round(rng.normal(3.0, 1.2, 1000), 2)))]
+                    for b in range(max(repeat, 3) + 1)])
+
+    def alert_batch():
+        for r in next(batches):
+            engine.add(r)
+
+    cases = {
+        "scoring.score_one": lambda: score_one(172, 81, 82, 131, 77, 16, "NO", app.kernel),
+        "log.append": lambda: app.session_log.append(row),
+        "log.append_many_256": lambda: app.session_log.append_many([row] * 256),
+        "log.log_score": lambda: app.log_score(row),
+        "callback.calculate_score": lambda: dispatch(
+            client, [("prediction-output", "children"), ("score-trend", "figure")],
+            [("predict", "n_clicks", 1)],
+            [("pid", "value", "P000001")] + [(cid, "value", v) for cid, v in vitals] + [("source", "value", "Remote")]),
+        "callback.traige_scores": lambda: dispatch(
+            client, [("inperson-table", "children"), ("inperson-trend", "figure")], url("/InPerson")),
+        "callback.traige_page": lambda: dispatch(
+            client, [("inperson-datatable", "data"), ("inperson-datatable", "page_count")],
+            page("inperson-datatable", [{"column_id": "Score", "direction": "desc"}], '{Risk} = "High"')),
+        "callback.remote_scores": lambda: dispatch(
+            client, [("remote-table", "children"), ("remote-trend", "figure")], url("/remote")),
+        "callback.remote_page": lambda: dispatch(
+            client, [("remote-datatable", "data"), ("remote-datatable", "page_count")],
+            page("remote-datatable", [], "")),
+        "callback.summary_graph": lambda: dispatch(client, [("risk-summary-chart", "figure")], url("/")),
+        # A wall screen's refresh tick when nothing was logged since its last one
+        "callback.traige_live_idle": live_idle,
+        "alerts.add_1k": alert_batch,
+    }
+    for name, fn in cases.items():
+        results[name] = measure(fn, repeat, budget)
+    return {"build_s": built, "results": results}
+
+
+# --- Offline pipeline over scaled copies of Health_observations.csv ---
+def bench_pipeline(scale, workdir):
+    from datasets import open_dataset
+    from pipeline import STAGES
+
+    data_dir = os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(os.path.join(workdir, "models"), exist_ok=True)
+    with open_dataset("Health_observations.csv") as f:
+        header, body = f.readline(), f.read()
+    if not body.endswith(b"\n"):
+        body += b"\n"
+    with open(os.path.join(data_dir, "Health_observations.csv"), "wb") as out:
+        out.write(header)
+        for _ in range(scale):
+            out.write(body)
+
+    # Every input and output stays inside the workspace: no fallback to data.zip or the repo's models/
+    env = dict(os.environ, DATA_DIR=data_dir, DATA_ARCHIVE=os.path.join(workdir, "none.zip"))
+    steps = [(s.name, [s.script, *s.args]) for s in STAGES]
+    steps.append(("score_batch", ["score_batch.py", os.path.join(data_dir, "cleaned_observations.csv"),
+                                  os.path.join(data_dir, "scored_observations.parquet")]))
+    results = {}
+    for name, (script, *args) in steps:
+        start = time.perf_counter()
+        done = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script), *args],
+                              cwd=workdir, env=env, capture_output=True, text=True)
+        if done.returncode != 0:
+            raise RuntimeError(f"pipeline stage {name} failed:\n{done.stderr[-2000:]}")
+        results[f"stage.{name}"] = summarize([time.perf_counter() - start])
+    return results
+
+
+# --- History and regression checks ---
+def host_info():
+    return {"node": platform.node(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "python": platform.python_version()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path=HISTORY_PATH):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"runs": []}
+
+
+def save_history(history, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def compare(run, history, baseline_runs=5, threshold=0.25):
+    """Metrics whose median moved more than `threshold` against the median of recent runs on this host.
+
+    Returns (regressions, improvements), each a list of (metric, baseline_ms, current_ms).
+    """
+    previous = [r for r in history["runs"] if r["host"] == run["host"]][-baseline_runs:]
+    regressions, improvements = [], []
+    for metric, stats in run["results"].items():
+        past = [r["results"][metric]["median_ms"] for r in previous if metric in r["results"]]
+        if not past:
+            continue
+        base, now = float(np.median(past)), stats["median_ms"]
+        if abs(now - base) < NOISE_FLOOR_MS:
+            continue
+        if now > base * (1 + threshold):
+            regressions.append((metric, base, now))
+        elif now < base / (1 + threshold):
+            improvements.append((metric, base, now))
+    return regressions, improvements
+
+
+def run_child(args, backend, size, workdir):
+    log_path = os.path.join(workdir, f"session_{backend}_{size_label(size)}.{'db' if backend == 'sqlite' else 'csv'}")
+    done = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "_app", "--backend", backend, "--size", str(size),
+         "--log-path", log_path, "--repeat", str(args.repeat), "--budget", str(args.budget),
+         "--days", str(args.days), "--seed", str(args.seed)],
+        capture_output=True, text=True,
+    )
+    if done.returncode != 0:
+        raise RuntimeError(f"{backend}/{size_label(size)} failed:\n{done.stderr[-2000:]}")
+    for path in (log_path, log_path + "-wal", log_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    # The app prints start-up messages; the child's result is its last line
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def main(args):
+    run = {"started": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": git_commit(), "host": host_info(),
+           "config": {"sizes": args.sizes, "backends": args.backends, "scales": args.scales,
+                      "repeat": args.repeat, "days": args.days}, "results": {}}
+    workdir = tempfile.mkdtemp(prefix="hrid-bench-")
+    try:
+        for backend in args.backends:
+            for size in args.sizes:
+                print(f"⏱️  {backend}, {size:,} rows...", flush=True)
+                child = run_child(args, backend, size, workdir)
+                print(f"    log built in {child['build_s']:.1f}s")
+                for metric, stats in child["results"].items():
+                    run["results"][f"{backend}/{size_label(size)}/{metric}"] = stats
+        for scale in args.scales:
+            print(f"⏱️  pipeline, Health_observations.csv x{scale}...", flush=True)
+            scaled = os.path.join(workdir, f"pipeline_x{scale}")
+            for metric, stats in bench_pipeline(scale, scaled).items():
+                run["results"][f"pipeline/x{scale}/{metric}"] = stats
+            shutil.rmtree(scaled, ignore_errors=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    history = load_history(args.history)
+    regressions, improvements = compare(run, history, args.baseline_runs, args.threshold)
+    width = max(len(m) for m in run["results"])
+    print(f"\n{'metric':<{width}}  {'median ms':>10}  {'p95 ms':>10}  {'n':>4}")
+    for metric, s in run["results"].items():
+        print(f"{metric:<{width}}  {s['median_ms']:>10.3f}  {s['p95_ms']:>10.3f}  {s['n']:>4}")
+    for label, rows in (("🐢 Regressions", regressions), ("⚡ Improvements", improvements)):
+        if rows:
+            print(f"\n{label} (vs median of the last {args.baseline_runs} runs on this host, ±{args.threshold:.0%}):")
+            for metric, base, now in rows:
+                print(f"    {metric}: {base:.3f} → {now:.3f} ms ({now / base - 1:+.0%})")
+    run["regressions"] = [m for m, _, _ in regressions]
+
+    if not args.no_save:
+        history["runs"].append(run)
+        save_history(history, args.history)
+        print(f"\n📁 Run recorded in {args.history} ({len(history['runs'])} runs)")
+    return not regressions
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["_app"]:
+        # Internal: one (backend, size) measurement, run in a fresh process so each app import is cold
+        child = argparse.ArgumentParser()
+        for flag in ("--backend", "--log-path"):
+            child.add_argument(flag, required=True)
+        for flag in ("--size", "--repeat", "--days", "--seed"):
+            child.add_argument(flag, type=int, required=True)
+        child.add_argument("--budget", type=float, required=True)
+        a = child.parse_args(sys.argv[2:])
+        print(json.dumps(bench_app(a.backend, a.size, a.log_path, a.repeat, a.budget, a.days, a.seed)))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Benchmark scoring, session-log appends, page callbacks and the "
+                                                 "offline pipeline; results are appended to a JSON history.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Synthetic session-log sizes (rows)")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--scales", type=int, nargs="*", default=PIPELINE_SCALES,
+                        help="Copies of Health_observations.csv to run the pipeline on (none = skip)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per metric")
+    parser.add_argument("--budget", type=float, default=3.0, help="Seconds per metric before stopping early (min 3 calls)")
+    parser.add_argument("--days", type=int, default=30, help="Days the synthetic scores are spread over")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--baseline-runs", type=int, default=5, help="Recent runs on this host to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown reported as a regression")
+    parser.add_argument("--no-save", action="store_true", help="Compare only; do not record this run")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on any regression")
+    args = parser.parse_args()
+
+    ok = main(args)
+    sys.exit(0 if ok or not args.fail_on_regression else 1)
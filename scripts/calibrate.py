@@ -0,0 +1,166 @@
+# scripts/calibrate.py
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from datasets import output_path, read_csv
+from risk_counters import RISK_LEVELS
+from scoring import load_kernel, score_batch
+from sketches import KLLSketch, load_sketches, merge_into, save_sketches
+
+THRESHOLDS_FILE = "score_thresholds.json"
+ALL = "all"
+UNKNOWN = "unknown"
+
+
+def key(source, stratum):
+    return f"{source}|{stratum}"
+
+
+def sketch_file(name, source_column="Source", default_source="InPerson", stratum=None, chunksize=500_000, k=400,
+                seed=0):
+    """Streams one dataset through the scorer into {"source|stratum": sketch} (plus per-source and overall `all`).
+
+    Rows the scorer cannot score (missing vitals) are left out. Memory is one chunk plus
+    O(k) values per key, whatever the size of the file. Every sketch is seeded with `seed`, so
+    the same inputs give the same proposal.
+    """
+    sketches = {}
+
+    def add(source, stratum_value, scores):
+        sketches.setdefault(key(source, stratum_value), KLLSketch(k, seed)).update(scores)
+
+    for chunk in read_csv(name, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip()
+        scores, _ = score_batch(chunk)
+        valid = ~np.isnan(scores)
+        if not valid.any():
+            continue
+        sources = (chunk[source_column].fillna(UNKNOWN).astype(str).to_numpy()[valid]
+                   if source_column in chunk.columns else np.full(valid.sum(), default_source))
+        scores = scores[valid]
+        add(ALL, ALL, scores)
+        frame = pd.DataFrame({"source": sources, "score": scores})
+        if stratum:
+            frame["stratum"] = chunk[stratum].fillna(UNKNOWN).astype(str).to_numpy()[valid]
+        for source, group in frame.groupby("source", sort=False):
+            add(source, ALL, group["score"].to_numpy())
+            if stratum:
+                for value, sub in group.groupby("stratum", sort=False):
+                    add(source, value, sub["score"].to_numpy())
+    return sketches
+
+
+def _sketch_file(job):
+    name, options = job
+    return sketch_file(name, **options)
+
+
+def sketch_files(names, jobs=1, **options):
+    # One worker process per file; the per-file sketches are merged as they come back
+    sketches = {}
+    if jobs > 1 and len(names) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for part in pool.map(_sketch_file, [(n, options) for n in names]):
+                merge_into(sketches, part)
+    else:
+        for name in names:
+            merge_into(sketches, sketch_file(name, **options))
+    return sketches
+
+
+def band_shares(sketch, low_max, medium_max):
+    # Estimated Low / Medium / High shares with `score <= low_max` and `score <= medium_max`
+    low, below_high = sketch.rank(low_max), sketch.rank(medium_max)
+    return [low, below_high - low, 1 - below_high]
+
+
+def propose(sketch, targets):
+    """Cut-offs whose Low / Medium / High shares come closest to `targets` (proportions summing to 1).
+
+    Scores are rounded to 2 decimals, so a cut-off is a score value and ties decide the exact
+    shares achieved; band_shares() reports them.
+    """
+    low_max = round(sketch.quantile(targets[0]), 2)
+    medium_max = round(sketch.quantile(targets[0] + targets[1]), 2)
+    return low_max, max(medium_max, low_max)
+
+
+def report(sketches, targets, kernel):
+    rows = []
+    for name in sorted(sketches, key=lambda k: (k.split("|")[0] != ALL, k)):
+        sketch = sketches[name]
+        low_max, medium_max = propose(sketch, targets)
+        now = band_shares(sketch, kernel["low_max"], kernel["medium_max"])
+        new = band_shares(sketch, low_max, medium_max)
+        rows.append({
+            "Source|Stratum": name, "Scores": sketch.n,
+            "p01": sketch.quantile(0.01), "p50": sketch.quantile(0.5), "p99": sketch.quantile(0.99),
+            "Current L/M/H": "/".join(f"{s:.1%}" for s in now),
+            "low_max": low_max, "medium_max": medium_max,
+            "Proposed L/M/H": "/".join(f"{s:.1%}" for s in new),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propose Low/Medium/High score cut-offs from the score distribution "
+                                                 "(streamed through mergeable quantile sketches).")
+    parser.add_argument("--input", nargs="*", help="Datasets with raw vitals (default: Health_observations.csv unless --merge is given)")
+    parser.add_argument("--targets", type=float, nargs=3, default=[0.6, 0.3, 0.1], metavar=("LOW", "MEDIUM", "HIGH"),
+                        help="Target share of each risk band")
+    parser.add_argument("--stratum", help="Column to stratify by within each Source, e.g. 'Tobacco smoking status'")
+    parser.add_argument("--source-column", default="Source")
+    parser.add_argument("--default-source", default="InPerson", help="Source of rows in datasets without a Source column")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    parser.add_argument("--k", type=int, default=400, help="Sketch size (rank error ~ 2/k)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the sketches' compactions (reproducible output)")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes (one file each)")
+    parser.add_argument("--merge", nargs="*", default=[], help="Sketch files from other runs or sites to merge in")
+    parser.add_argument("--save-sketches", help="Write the (merged) sketches to this JSON file")
+    parser.add_argument("--apply", default=key(ALL, ALL), help="Source|Stratum whose proposal --write saves")
+    parser.add_argument("--write", action="store_true", help=f"Save the proposal to data/{THRESHOLDS_FILE} for compile_scorer.py")
+    args = parser.parse_args()
+
+    if abs(sum(args.targets) - 1) > 1e-6 or min(args.targets) < 0:
+        raise SystemExit("❌ --targets must be three non-negative shares summing to 1")
+    inputs = args.input if args.input is not None else ([] if args.merge else ["Health_observations.csv"])
+
+    start = time.perf_counter()
+    sketches = sketch_files(inputs, jobs=args.jobs, source_column=args.source_column, default_source=args.default_source,
+                            stratum=args.stratum, chunksize=args.chunksize, k=args.k, seed=args.seed)
+    for path in args.merge:
+        merge_into(sketches, load_sketches(path, args.seed))
+    if not sketches:
+        raise SystemExit("❌ No scores to calibrate on")
+    total = sketches[key(ALL, ALL)].n
+    print(f"📊 {total:,} scores from {len(inputs)} dataset(s) and {len(args.merge)} sketch file(s) "
+          f"in {time.perf_counter() - start:.1f}s; {sum(s.size() for s in sketches.values()):,} values kept")
+
+    kernel = load_kernel()
+    table = report(sketches, args.targets, kernel)
+    print(f"🎯 Targets {'/'.join(f'{t:.0%}' for t in args.targets)} ({'/'.join(RISK_LEVELS)}); "
+          f"current cut-offs: score <= {kernel['low_max']} Low, <= {kernel['medium_max']} Medium")
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.2f}".format):
+        print(table.to_string(index=False))
+
+    if args.save_sketches:
+        os.makedirs(os.path.dirname(args.save_sketches) or ".", exist_ok=True)
+        save_sketches(sketches, args.save_sketches)
+        print(f"📁 Sketches saved to {args.save_sketches}")
+    if args.write:
+        if args.apply not in sketches:
+            raise SystemExit(f"❌ No sketch for {args.apply!r}")
+        low_max, medium_max = propose(sketches[args.apply], args.targets)
+        path = output_path(THRESHOLDS_FILE)
+        with open(path, "w") as f:
+            json.dump({"low_max": low_max, "medium_max": medium_max, "targets": args.targets, "key": args.apply,
+                       "scores": sketches[args.apply].n, "created": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=2)
+        print(f"✅ Cut-offs for {args.apply}: Low <= {low_max}, Medium <= {medium_max}; saved to {path}")
+        print("   Apply them with: python scripts/compile_scorer.py --thresholds " + path +
+              " && python scripts/model_bundle.py build")
@@ -1,10 +1,8 @@
 # scripts/clean_data.py
-import pandas as pd
-import os
+from datasets import output_path, read_csv
 
-# Load original dataset
-data_path = os.path.join("data", "Health_observations.csv")
-df = pd.read_csv(data_path)
+# Load original dataset (extracted file, or streamed from data.zip)
+df = read_csv("Health_observations.csv")
 
 # Strip columns
 df.columns = df.columns.str.strip()
@@ -21,7 +19,7 @@ df['Tobacco smoking status'] = df['Tobacco smoking status'].replace({
     'Smoker (finding)': 'YES'
 })
 
-# Save cleaned dataset
-df.to_csv(data_path, index=False)
+# Save cleaned dataset next to the raw one (the raw file is never overwritten, so reruns are idempotent)
+df.to_csv(output_path("cleaned_observations.csv"), index=False)
 
-print(" Data cleaned and saved to 'Health_observations.csv'")
+print(" Data cleaned and saved to 'cleaned_observations.csv'")
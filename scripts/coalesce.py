@@ -0,0 +1,138 @@
+# scripts/coalesce.py
+import argparse
+import time
+
+import numpy as np
+from datasets import output_path, read_csv
+
+# The target is never carried forward: a row without its own label stays incomplete
+TARGET_PREFIX = "Pain severity"
+
+
+class Coalescer:
+    """Forward-fills partial observation rows into complete records, chunk by chunk.
+
+    A missing value takes the column's last observed value, as long as that observation is in
+    the same segment (a run of consecutive rows with equal `group` values) and at most `limit`
+    rows back. The carry state (last observed value and row of every column, current segment)
+    spans chunks, so the output is identical for any chunk size. Each chunk is filled with
+    NumPy running maxima over row positions; there is no per-row Python loop.
+    """
+
+    def __init__(self, columns=None, group=(), limit=None):
+        self.columns = list(columns) if columns else None
+        self.group = list(group)
+        self.limit = limit
+        self.offset = 0
+        self.segment_start = 0
+        self.last_key = None
+        self.last_pos = {}
+        self.last_value = {}
+        self.rows = 0
+        self.complete = 0
+        self.filled = 0
+
+    def _fill_columns(self, chunk):
+        if self.columns is not None:
+            missing = [c for c in self.columns + self.group if c not in chunk.columns]
+            if missing:
+                raise KeyError(f"❌ Column(s) not found: {', '.join(missing)}")
+            return self.columns
+        return [c for c in chunk.columns if c not in self.group and not c.startswith(TARGET_PREFIX)]
+
+    def _segment_starts(self, chunk, pos):
+        if not self.group:
+            return np.full(len(chunk), self.segment_start)
+        keys = chunk[self.group].to_numpy(dtype=object)
+        previous = np.empty_like(keys)
+        previous[1:] = keys[:-1]
+        previous[0] = self.last_key if self.last_key is not None else object()
+        # NaN keys never compare equal, so rows without a group key start their own segment
+        changed = (keys != previous).any(axis=1)
+        self.last_key = keys[-1]
+        return np.maximum.accumulate(np.where(changed, pos, self.segment_start))
+
+    def fill(self, chunk):
+        n = len(chunk)
+        if n == 0:
+            return chunk
+        chunk = chunk.copy()
+        pos = np.arange(self.offset, self.offset + n)
+        starts = self._segment_starts(chunk, pos)
+        for col in self._fill_columns(chunk):
+            values = chunk[col].to_numpy(copy=True)
+            valid = chunk[col].notna().to_numpy()
+            # Row of the latest observation at or before each row (-1: none yet)
+            last = np.maximum.accumulate(np.where(valid, pos, self.last_pos.get(col, -1)))
+            fill = ~valid & (last >= starts) & (last >= 0)
+            if self.limit is not None:
+                fill &= pos - last <= self.limit
+            if fill.any():
+                here = fill & (last >= self.offset)
+                values[here] = values[last[here] - self.offset]
+                carried = fill & ~here
+                if carried.any():
+                    values[carried] = self.last_value[col]
+                chunk[col] = values
+                self.filled += int(fill.sum())
+            if valid.any():
+                i = n - 1 - int(np.argmax(valid[::-1]))
+                self.last_pos[col] = int(pos[i])
+                self.last_value[col] = values[i]
+        self.offset += n
+        self.segment_start = int(starts[-1])
+        self.rows += n
+        self.complete += int(chunk.notna().all(axis=1).sum())
+        return chunk
+
+
+def strategies(group=(), limits=(1, 3, 10)):
+    # name -> Coalescer; `dropna` fills nothing and counts the rows that are complete as they are
+    out = {"dropna": Coalescer(limit=0), "ffill": Coalescer()}
+    for k in limits:
+        out[f"ffill limit={k}"] = Coalescer(limit=k)
+    if group:
+        out[f"ffill by {'+'.join(group)}"] = Coalescer(group=group)
+        for k in limits:
+            out[f"ffill by {'+'.join(group)} limit={k}"] = Coalescer(group=group, limit=k)
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coalesce partial observation rows into complete vitals records (streaming forward-fill).")
+    parser.add_argument("--input", default="Health_observations.csv", help="Dataset to read (e.g. cleaned_observations.csv)")
+    parser.add_argument("--output", default="coalesced_observations.csv", help="Output dataset name")
+    parser.add_argument("--group", nargs="+", default=[], help="Columns whose change starts a new sequence")
+    parser.add_argument("--limit", type=int, help="Carry a value at most this many rows forward")
+    parser.add_argument("--columns", nargs="+", help="Columns to fill (default: all but the group and target columns)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows read per chunk")
+    parser.add_argument("--report", action="store_true", help="Compare strategies (complete records each yields); writes nothing")
+    parser.add_argument("--limits", type=int, nargs="*", default=[1, 3, 10], help="Limits compared by --report")
+    args = parser.parse_args()
+
+    if args.report:
+        candidates = strategies(args.group, args.limits)
+        elapsed = dict.fromkeys(candidates, 0.0)
+        for chunk in read_csv(args.input, chunksize=args.chunksize):
+            chunk.columns = chunk.columns.str.strip()
+            for name, coalescer in candidates.items():
+                start = time.perf_counter()
+                coalescer.fill(chunk)
+                elapsed[name] += time.perf_counter() - start
+        base = max(candidates["dropna"].complete, 1)
+        rows = candidates["dropna"].rows
+        print(f"📊 {args.input}: {rows} rows, {candidates['dropna'].complete} complete as they are")
+        print(f"{'strategy':<34} {'complete':>10} {'% rows':>7} {'x dropna':>9} {'filled':>9} {'time':>8}")
+        for name, c in candidates.items():
+            print(f"{name:<34} {c.complete:>10} {c.complete / max(rows, 1):>7.1%} {c.complete / base:>9.2f} "
+                  f"{c.filled:>9} {elapsed[name]:>7.2f}s")
+    else:
+        coalescer = Coalescer(args.columns, args.group, args.limit)
+        out_path = output_path(args.output)
+        header = True
+        for chunk in read_csv(args.input, chunksize=args.chunksize):
+            chunk.columns = chunk.columns.str.strip()
+            coalescer.fill(chunk).to_csv(out_path, mode="w" if header else "a", header=header, index=False)
+            header = False
+        print(f"✅ Coalesced {coalescer.rows} rows: {coalescer.complete} complete records, {coalescer.filled} values filled")
+        print(f"📁 Saved to {out_path}")
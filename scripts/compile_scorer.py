@@ -0,0 +1,72 @@
+# scripts/compile_scorer.py
+import argparse
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scoring import (
+    KERNEL_PATH, WEIGHTS, classify, compile_kernel, derive_features, kernel_scores,
+    load_scaler, reference_scores
+)
+
+
+def load_weights(path):
+    table = pd.read_csv(path)
+    return list(zip(table["Feature"], table["Assigned Weight"].astype(float)))
+
+
+def load_thresholds(path):
+    # Cut-offs proposed by calibrate.py --write
+    with open(path) as f:
+        t = json.load(f)
+    if not t["low_max"] <= t["medium_max"]:
+        raise SystemExit(f"❌ {path}: low_max must not exceed medium_max")
+    return t["low_max"], t["medium_max"]
+
+
+def random_vitals(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return derive_features(
+        rng.uniform(120, 210, n), rng.uniform(30, 180, n), rng.uniform(40, 120, n),
+        rng.uniform(80, 220, n), rng.uniform(40, 160, n), rng.uniform(8, 35, n),
+        rng.integers(0, 3, n).astype(float),
+    )
+
+
+def parity_check(kernel, scaler, weights, n=100_000):
+    # Compare the compiled kernel with the scaler + weighted-sum reference path
+    feats = random_vitals(n)
+    expected = reference_scores(feats, scaler, weights)
+    actual = kernel_scores(feats, kernel)
+    max_diff = float(np.max(np.abs(actual - expected)))
+    rounded = np.round(actual, 2) != np.round(expected, 2)
+    bands = classify(np.round(actual, 2), kernel) != classify(np.round(expected, 2), kernel)
+    return max_diff, int(rounded.sum()), int(bands.sum())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold the scaler into the score weights and save the compiled scorer.")
+    parser.add_argument("--weights", help="Optional weight table (Feature, Assigned Weight), e.g. data/scoring_weights.csv")
+    parser.add_argument("--thresholds", help="Risk-band cut-offs from calibrate.py --write, e.g. data/score_thresholds.json")
+    parser.add_argument("--out", default=KERNEL_PATH)
+    parser.add_argument("--check-rows", type=int, default=100_000, help="Random records used for the parity check")
+    args = parser.parse_args()
+
+    scaler = load_scaler()
+    weights = load_weights(args.weights) if args.weights else WEIGHTS
+    kernel = compile_kernel(scaler, weights, *(load_thresholds(args.thresholds) if args.thresholds else ()))
+
+    max_diff, rounded, bands = parity_check(kernel, scaler, weights, args.check_rows)
+    print(f"🔍 Parity vs scaler path over {args.check_rows} records: max |diff| = {max_diff:.2e}, "
+          f"rounded-score mismatches = {rounded}, risk-band mismatches = {bands}")
+    if max_diff > 1e-9:
+        raise SystemExit("❌ Compiled scorer diverges from the reference path; not saved.")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    joblib.dump(kernel, args.out)
+    print(f"✅ Compiled scorer saved to {args.out} (Low <= {kernel['low_max']}, Medium <= {kernel['medium_max']})")
+    print("score = {:.6f} + ".format(kernel["intercept"]) +
+          " + ".join(f"{c:.6g} × {f}" for f, c in zip(kernel["features"], kernel["coef"])))
@@ -0,0 +1,144 @@
+# scripts/datasets.py
+import os
+import zipfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Datasets are looked up in DATA_DIR first, then streamed out of the shipped archive
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+DATA_ARCHIVE = os.environ.get("DATA_ARCHIVE", "data.zip")
+ARCHIVE_PREFIX = "data/"
+
+PROCESSED_CSV = os.path.join(DATA_DIR, "processed_data.csv")
+PROCESSED_PARQUET = os.path.join(DATA_DIR, "processed_data.parquet")
+
+
+def dataset_path(name):
+    return os.path.join(DATA_DIR, name)
+
+
+def output_path(name):
+    # Outputs always go to DATA_DIR (created on demand, e.g. when inputs come from the archive)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return dataset_path(name)
+
+
+def archive_member(name):
+    if not os.path.exists(DATA_ARCHIVE):
+        return None
+    member = ARCHIVE_PREFIX + name
+    with zipfile.ZipFile(DATA_ARCHIVE) as zf:
+        return member if member in zf.namelist() else None
+
+
+def dataset_exists(name):
+    return os.path.exists(dataset_path(name)) or archive_member(name) is not None
+
+
+@contextmanager
+def open_dataset(name):
+    # Binary file object for `name`: the extracted file, or a streamed (never extracted) zip member
+    path = dataset_path(name)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            yield f
+        return
+    member = archive_member(name)
+    if member is None:
+        raise FileNotFoundError(f"Dataset {name!r} not found in {DATA_DIR}/ or {DATA_ARCHIVE}")
+    with zipfile.ZipFile(DATA_ARCHIVE) as zf, zf.open(member) as f:
+        yield f
+
+
+def _iter_csv(name, chunksize, **kwargs):
+    with open_dataset(name) as f:
+        yield from pd.read_csv(f, chunksize=chunksize, **kwargs)
+
+
+def read_csv(name, chunksize=None, **kwargs):
+    # Same as pd.read_csv, but `name` is resolved through open_dataset; chunks stream straight from the archive
+    if chunksize:
+        return _iter_csv(name, chunksize, **kwargs)
+    with open_dataset(name) as f:
+        return pd.read_csv(f, **kwargs)
+
+# Compact dtypes for the columnar copy: flags as bool, codes and the 0-10 target as int8, measurements
+# as float32; other integer columns keep their type
+INT8_COLS = ["Smoking_encoded", "Pain severity"]
+FLAG_PREFIX = "BMI_Category_"
+
+
+def compact_dtypes(df):
+    df = df.copy()
+    for col in df.columns:
+        if col.startswith(FLAG_PREFIX):
+            df[col] = df[col].astype(bool)
+        elif col in INT8_COLS:
+            df[col] = df[col].astype(np.int8)
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+class ParquetChunkWriter:
+    """Appends DataFrame chunks to one Parquet file with compact dtypes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def write_parquet(df, path=PROCESSED_PARQUET):
+    writer = ParquetChunkWriter(path)
+    try:
+        writer.write(df)
+    finally:
+        writer.close()
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parquet_is_current():
+    # The columnar copy is used unless a processed CSV was written after it (e.g. --format csv)
+    if not (os.path.exists(PROCESSED_PARQUET) and parquet_available()):
+        return False
+    return not os.path.exists(PROCESSED_CSV) or os.path.getmtime(PROCESSED_PARQUET) >= os.path.getmtime(PROCESSED_CSV)
+
+
+def read_processed(columns=None):
+    # Prefer the columnar copy (memory-mapped, only the requested columns); fall back to the CSV
+    if parquet_is_current():
+        import pyarrow.parquet as pq
+        return pq.read_table(PROCESSED_PARQUET, columns=columns, memory_map=True).to_pandas()
+    return read_csv("processed_data.csv", usecols=columns)
+
+
+def iter_processed(chunksize, columns=None):
+    # Streaming counterpart of read_processed: Parquet record batches, else CSV chunks
+    if parquet_is_current():
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(PROCESSED_PARQUET, memory_map=True)
+        for batch in pf.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    yield from read_csv("processed_data.csv", chunksize=chunksize, usecols=columns)
@@ -1,50 +1,16 @@
 # scripts/enhance_features.py
+import argparse
 import pandas as pd
 import os
 import joblib
 from sklearn.preprocessing import StandardScaler
+from datasets import DATA_DIR, PROCESSED_CSV, PROCESSED_PARQUET, read_csv, write_parquet
+from feature_pipeline import move_target_last, output_paths, run_chunked
+
+data_name = "Health_observations.csv"
+processed_path = PROCESSED_CSV
+target_col = "Pain severity"
 
-# Load original data
-data_path = os.path.join("data", "Health_observations.csv")
-df = pd.read_csv(data_path)
-df.columns = df.columns.str.strip()
-
-# --- Basic Feature Engineering ---
-df['BMI'] = df['Body Weight'] / ((df['Body Height'] / 100) ** 2)
-df['Pulse_Pressure'] = df['Systolic Blood Pressure'] - df['Diastolic Blood Pressure']
-df['BP_Ratio'] = df['Systolic Blood Pressure'] / df['Diastolic Blood Pressure']
-df['HRxRR'] = df['Heart rate'] * df['Respiratory rate']
-
-# --- Normalize and Encode Smoking Status ---
-smoking_map = {
-    'NO': 'NO',
-    'EX': 'EX',
-    'Smokes tobacco daily (finding)': 'YES'
-}
-df['Tobacco smoking status'] = df['Tobacco smoking status'].map(smoking_map)
-smoking_encode = {'NO': 0, 'EX': 1, 'YES': 2}
-df['Smoking_encoded'] = df['Tobacco smoking status'].map(smoking_encode)
-
-df.drop(columns=['Tobacco smoking status'], inplace=True)
-df.dropna(inplace=True)
-
-# --- Advanced Feature Engineering ---
-df['HeartStress'] = df['Heart rate'] / df['BMI']
-df['SmokingBMI'] = df['Smoking_encoded'] * df['BMI']
-df['Pulse_HR'] = df['Pulse_Pressure'] * df['Heart rate']
-df['BP_Smoking'] = df['BP_Ratio'] * df['Smoking_encoded']
-
-# --- BMI Category Binning ---
-df['BMI_Category'] = pd.cut(
-    df['BMI'],
-    bins=[-float("inf"), 18.5, 24.9, 29.9, float("inf")],
-    labels=['Underweight', 'Normal', 'Overweight', 'Obese']
-)
-
-# One-hot encode BMI category
-df = pd.get_dummies(df, columns=['BMI_Category'], drop_first=True)
-
-# --- Scaling ---
 numerical_cols = [
     'Body Height', 'Body Weight',
     'Diastolic Blood Pressure', 'Systolic Blood Pressure',
@@ -53,18 +19,81 @@ numerical_cols = [
     'HeartStress', 'SmokingBMI', 'Pulse_HR', 'BP_Smoking'
 ]
 
-scaler = StandardScaler()
-df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
 
-# Reorder target to last
-target_col = "Pain severity"
-cols = [col for col in df.columns if col != target_col] + [target_col]
-df = df[cols]
+def engineer_features(df):
+    # Row-wise only, so it gives the same result on the whole file or on any chunk of it
+    df = df.copy()
+
+    # --- Basic Feature Engineering ---
+    df['BMI'] = df['Body Weight'] / ((df['Body Height'] / 100) ** 2)
+    df['Pulse_Pressure'] = df['Systolic Blood Pressure'] - df['Diastolic Blood Pressure']
+    df['BP_Ratio'] = df['Systolic Blood Pressure'] / df['Diastolic Blood Pressure']
+    df['HRxRR'] = df['Heart rate'] * df['Respiratory rate']
+
+    # --- Normalize and Encode Smoking Status ---
+    smoking_map = {
+        'NO': 'NO',
+        'EX': 'EX',
+        'Smokes tobacco daily (finding)': 'YES'
+    }
+    df['Tobacco smoking status'] = df['Tobacco smoking status'].map(smoking_map)
+    smoking_encode = {'NO': 0, 'EX': 1, 'YES': 2}
+    df['Smoking_encoded'] = df['Tobacco smoking status'].map(smoking_encode)
+
+    df.drop(columns=['Tobacco smoking status'], inplace=True)
+    df.dropna(inplace=True)
+
+    # --- Advanced Feature Engineering ---
+    df['HeartStress'] = df['Heart rate'] / df['BMI']
+    df['SmokingBMI'] = df['Smoking_encoded'] * df['BMI']
+    df['Pulse_HR'] = df['Pulse_Pressure'] * df['Heart rate']
+    df['BP_Smoking'] = df['BP_Ratio'] * df['Smoking_encoded']
+
+    # --- BMI Category Binning ---
+    df['BMI_Category'] = pd.cut(
+        df['BMI'],
+        bins=[-float("inf"), 18.5, 24.9, 29.9, float("inf")],
+        labels=['Underweight', 'Normal', 'Overweight', 'Obese']
+    )
+
+    # One-hot encode BMI category (categorical dtype keeps every column, even in a chunk without that category)
+    return pd.get_dummies(df, columns=['BMI_Category'], drop_first=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature engineering + scaling for the health observations.")
+    parser.add_argument("--input", default=data_name, help="Dataset to read (e.g. cleaned_observations.csv)")
+    parser.add_argument("--chunksize", type=int, help="Stream the input in chunks of this many rows (two passes)")
+    parser.add_argument("--format", choices=["csv", "parquet", "both"], default="both",
+                        help="Processed dataset format (Parquet uses compact float32 / bool / int8 columns)")
+    args = parser.parse_args()
+    csv_out, parquet_out = output_paths(args.format, processed_path, PROCESSED_PARQUET)
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    if args.chunksize:
+        scaler, rows = run_chunked(args.input, engineer_features, numerical_cols, csv_out, target_col, args.chunksize, parquet_out)
+        print(f"🔁 Streamed {rows} rows in chunks of {args.chunksize}")
+    else:
+        # Load original data
+        df = read_csv(args.input)
+        df.columns = df.columns.str.strip()
+        df = engineer_features(df)
+
+        # --- Scaling ---
+        scaler = StandardScaler()
+        df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
+
+        # Reorder target to last
+        df = move_target_last(df, target_col)
+        if csv_out:
+            df.to_csv(csv_out, index=False)
+        if parquet_out:
+            write_parquet(df, parquet_out)
 
-# Save dataset and scaler
-processed_path = "data/processed_data.csv"
-df.to_csv(processed_path, index=False)
-joblib.dump(scaler, "models/scaler.pkl")
+    # Save scaler
+    joblib.dump(scaler, "models/scaler.pkl")
 
-print("✅ Advanced feature engineering complete.")
-print(f"📁 Processed dataset saved to {processed_path}")
+    print("✅ Advanced feature engineering complete.")
+    for out in (csv_out, parquet_out):
+        if out:
+            print(f"📁 Processed dataset saved to {out}")
@@ -0,0 +1,57 @@
+# scripts/export_classifier.py
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+
+from datasets import read_processed
+from tree_model import CLASSIFIER_PATH, TREES_PATH, export_trees, predict_proba, save_trees
+
+
+def check_inputs(features, n, seed=42):
+    # Processed rows plus random rows with some missing values (exercises default directions)
+    rng = np.random.default_rng(seed)
+    rows = read_processed(columns=list(features)).to_numpy(dtype=np.float32)
+    rows = rows[rng.choice(len(rows), size=min(n, len(rows)), replace=False)]
+    noise = rng.normal(0, 2, size=(n, len(features))).astype(np.float32)
+    noise[rng.random(noise.shape) < 0.1] = np.nan
+    return np.vstack([rows, noise])
+
+
+def parity_check(model, trees, X):
+    start = time.perf_counter()
+    expected = model.predict_proba(X)
+    xgb_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = predict_proba(X, trees)
+    np_time = time.perf_counter() - start
+    max_diff = float(np.max(np.abs(actual - expected)))
+    labels = int((actual.argmax(axis=1) != expected.argmax(axis=1)).sum())
+    return max_diff, labels, xgb_time, np_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the XGBoost risk classifier as flat NumPy tree arrays.")
+    parser.add_argument("--model", default=CLASSIFIER_PATH)
+    parser.add_argument("--out", default=TREES_PATH)
+    parser.add_argument("--check-rows", type=int, default=20_000, help="Processed + random records used for the parity check")
+    parser.add_argument("--tolerance", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    trees = export_trees(model)
+    print(f"🌲 {len(trees['roots'])} trees, {len(trees['feature'])} nodes, max depth {int(trees['max_depth'])}, "
+          f"{len(trees['base_score'])} classes")
+
+    X = check_inputs(trees["features"], args.check_rows)
+    max_diff, labels, xgb_time, np_time = parity_check(model, trees, X)
+    print(f"🔍 Parity vs predict_proba over {len(X)} records: max |diff| = {max_diff:.2e}, "
+          f"label mismatches = {labels} (xgboost {xgb_time:.2f}s, NumPy {np_time:.2f}s)")
+    if max_diff > args.tolerance:
+        raise SystemExit("❌ NumPy evaluator diverges from xgboost; not saved.")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    save_trees(trees, args.out)
+    print(f"✅ Tree arrays saved to {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB)")
@@ -0,0 +1,66 @@
+# scripts/feature_pipeline.py
+from sklearn.preprocessing import StandardScaler
+from datasets import ParquetChunkWriter, parquet_available, read_csv
+
+
+def iter_chunks(name, chunksize):
+    # `name` is a dataset name, resolved to data/ or streamed from data.zip
+    for chunk in read_csv(name, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+
+def move_target_last(df, target_col):
+    cols = [col for col in df.columns if col != target_col] + [target_col]
+    return df[cols]
+
+
+def fit_scaler_streaming(path, engineer, numerical_cols, chunksize):
+    # Pass 1: derive features chunk by chunk and accumulate mean / variance with partial_fit
+    scaler = StandardScaler()
+    rows = 0
+    for chunk in iter_chunks(path, chunksize):
+        chunk = engineer(chunk)
+        if len(chunk):
+            scaler.partial_fit(chunk[numerical_cols])
+            rows += len(chunk)
+    return scaler, rows
+
+
+def transform_streaming(path, engineer, numerical_cols, scaler, out_path, target_col, chunksize, parquet_path=None):
+    # Pass 2: re-derive each chunk, scale it with the fitted scaler and append it to the outputs
+    header = True
+    parquet = ParquetChunkWriter(parquet_path) if parquet_path else None
+    try:
+        for chunk in iter_chunks(path, chunksize):
+            chunk = engineer(chunk)
+            if not len(chunk):
+                continue
+            chunk[numerical_cols] = scaler.transform(chunk[numerical_cols])
+            chunk = move_target_last(chunk, target_col)
+            if out_path:
+                chunk.to_csv(out_path, mode="w" if header else "a", header=header, index=False)
+            if parquet is not None:
+                parquet.write(chunk)
+            header = False
+    finally:
+        if parquet is not None:
+            parquet.close()
+
+
+def run_chunked(path, engineer, numerical_cols, out_path, target_col, chunksize, parquet_path=None):
+    # Peak memory is bounded by one chunk; the input is read twice
+    scaler, rows = fit_scaler_streaming(path, engineer, numerical_cols, chunksize)
+    transform_streaming(path, engineer, numerical_cols, scaler, out_path, target_col, chunksize, parquet_path)
+    return scaler, rows
+
+
+def output_paths(fmt, csv_path, parquet_path):
+    # --format csv | parquet | both -> (csv_path or None, parquet_path or None)
+    if fmt != "csv" and not parquet_available():
+        if fmt == "parquet":
+            raise SystemExit("❌ --format parquet needs pyarrow (pip install pyarrow)")
+        print("ℹ️ pyarrow not installed; writing CSV only.")
+        fmt = "csv"
+    return (csv_path if fmt in ("csv", "both") else None,
+            parquet_path if fmt in ("parquet", "both") else None)
@@ -1,32 +1,169 @@
 # scripts/generate_weights.py
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
+from datasets import output_path, read_csv, read_processed
+
+TARGET = "Pain severity"
+TOP_K = 10
+
+
+def build_weight_table(correlations, top_k=TOP_K):
+    top_features = correlations.abs().sort_values(ascending=False).head(top_k)
+
+    # Normalize weights
+    weights = (top_features / top_features.sum()).round(3)
+
+    # Combine into a DataFrame
+    return pd.DataFrame({
+        "Feature": top_features.index,
+        "Correlation": correlations[top_features.index].round(3),
+        "Assigned Weight": weights.values
+    })
+
+
+# --- Full-dataset mode: all feature-vs-target correlations from weighted sums ---
+def _centered_arrays(df):
+    features = [c for c in df.columns if c != TARGET]
+    X = df[features].to_numpy(dtype=np.float64)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    # Centre once on the full-data means so the sums below don't suffer from cancellation
+    X = X - X.mean(axis=0)
+    y = y - y.mean()
+    return features, X, y
+
+
+def moments(X, y):
+    # Row-wise products reused by every bootstrap replicate
+    return X, y, X * y[:, None], X * X, y * y
+
+
+def weighted_correlations(m, w):
+    # Pearson r of every feature with the target, each row counted w[i] times (w = bootstrap counts)
+    X, y, XY, XX, YY = m
+    n = w.sum()
+    mx, my = (w @ X) / n, (w @ y) / n
+    cov = (w @ XY) / n - mx * my
+    var_x = (w @ XX) / n - mx * mx
+    var_y = (w @ YY) / n - my * my
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return cov / np.sqrt(var_x * var_y)
+
+
+def top_k_weights(corr, top_k=TOP_K):
+    # Weight vector over all features: normalised |r| for the top_k, 0 elsewhere; plus rank (1 = strongest)
+    strength = np.nan_to_num(np.abs(corr))
+    order = np.argsort(-strength, kind="stable")
+    rank = np.empty(len(corr), dtype=np.int32)
+    rank[order] = np.arange(1, len(corr) + 1)
+    weights = np.zeros(len(corr))
+    top = order[:top_k]
+    weights[top] = strength[top] / strength[top].sum()
+    return weights, rank
+
+
+_moments = None
+
+
+def _init_worker(X, y):
+    global _moments
+    _moments = moments(X, y)
+
+
+def _bootstrap_batch(args):
+    seed, count = args
+    rng = np.random.default_rng(seed)
+    n = len(_moments[1])
+    corrs, weights, ranks = [], [], []
+    for _ in range(count):
+        # Row counts of a resample with replacement, without materialising the resampled rows
+        w = np.bincount(rng.integers(0, n, n), minlength=n).astype(np.float64)
+        corr = weighted_correlations(_moments, w)
+        wt, rank = top_k_weights(corr)
+        corrs.append(corr)
+        weights.append(wt)
+        ranks.append(rank)
+    return np.array(corrs), np.array(weights), np.array(ranks)
+
+
+def bootstrap(X, y, n_boot, jobs=None, seed=42, batch=25):
+    # One seed per batch: results do not depend on how batches are spread over workers
+    sizes = [min(batch, n_boot - i) for i in range(0, n_boot, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(X, y)) as pool:
+        parts = list(pool.map(_bootstrap_batch, zip(seeds, sizes)))
+    return tuple(np.concatenate([p[i] for p in parts]) for i in range(3))
+
+
+def bootstrap_table(features, point_weights, corrs, weights, ranks, alpha=0.05):
+    lo, hi = 100 * alpha / 2, 100 * (1 - alpha / 2)
+    table = pd.DataFrame({
+        "Feature": features,
+        "Assigned Weight": point_weights.round(3),
+        "Weight CI Low": np.percentile(weights, lo, axis=0).round(3),
+        "Weight CI High": np.percentile(weights, hi, axis=0).round(3),
+        "Correlation CI Low": np.nanpercentile(corrs, lo, axis=0).round(3),
+        "Correlation CI High": np.nanpercentile(corrs, hi, axis=0).round(3),
+        "Median Rank": np.median(ranks, axis=0),
+        "Rank CI Low": np.percentile(ranks, lo, axis=0),
+        "Rank CI High": np.percentile(ranks, hi, axis=0),
+        f"Top-{TOP_K} Frequency": (ranks <= TOP_K).mean(axis=0).round(3),
+    })
+    return table.sort_values(["Median Rank", "Feature"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derive score weights from feature-vs-pain-severity correlations.")
+    parser.add_argument("--full", action="store_true", help="Use the full processed dataset instead of the 60-case sample")
+    parser.add_argument("--bootstrap", type=int, default=0, help="Bootstrap resamples for confidence intervals (with --full)")
+    parser.add_argument("--jobs", type=int, help="Worker processes for the bootstrap (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Weight table path (default: data/scoring_weights.csv, or "
+                                         "data/scoring_weights_full.csv with --full)")
+    args = parser.parse_args()
+    if args.bootstrap and not args.full:
+        parser.error("--bootstrap requires --full")
+
+    if not args.full:
+        # Load your manually sampled 60-case file
+        df = read_csv("sample_60_cases.csv")
 
-# Load your manually sampled 60-case file
-df = pd.read_csv("data/sample_60_cases.csv")
+        # Correlate all features with Pain severity
+        correlations = df.corr(numeric_only=True)['Pain severity'].drop('Pain severity')
+    else:
+        df = read_processed()
+        features, X, y = _centered_arrays(df)
+        del df
+        corr = weighted_correlations(moments(X, y), np.ones(len(y)))
+        correlations = pd.Series(corr, index=features)
+        print(f"📊 Correlations computed over {len(y)} rows and {len(features)} features")
 
-# Correlate all features with Pain severity
-correlations = df.corr(numeric_only=True)['Pain severity'].drop('Pain severity')
-top_features = correlations.abs().sort_values(ascending=False).head(10)
+    weight_table = build_weight_table(correlations)
 
-# Normalize weights
-weights = (top_features / top_features.sum()).round(3)
+    # Build score formula
+    formula_parts = [f"{w} × {feat}" for feat, w in zip(weight_table['Feature'], weight_table['Assigned Weight'])]
+    score_formula = " + ".join(formula_parts)
 
-# Combine into a DataFrame
-weight_table = pd.DataFrame({
-    "Feature": top_features.index,
-    "Correlation": correlations[top_features.index].round(3),
-    "Assigned Weight": weights.values
-})
+    # Save to view or edit manually later; full-data weights never overwrite the sample-derived table
+    weights_path = args.output or output_path("scoring_weights_full.csv" if args.full else "scoring_weights.csv")
+    weight_table.to_csv(weights_path, index=False)
 
-# Build score formula
-formula_parts = [f"{w} × {feat}" for feat, w in zip(weight_table['Feature'], weight_table['Assigned Weight'])]
-score_formula = " + ".join(formula_parts)
+    print("✅ Top weighted features extracted.")
+    print(f"📁 Saved to: {weights_path}")
+    print("\n📐 Suggested Scoring Formula:")
+    print(f"score = {score_formula}")
 
-# Save to view or edit manually later
-weight_table.to_csv("data/scoring_weights.csv", index=False)
+    if args.full and args.bootstrap:
+        corrs, weights, ranks = bootstrap(X, y, args.bootstrap, args.jobs, args.seed)
+        point_weights, point_rank = top_k_weights(corr)
+        ci_table = bootstrap_table(features, point_weights, corrs, weights, ranks)
+        ci_path = output_path("scoring_weights_bootstrap.csv")
+        ci_table.to_csv(ci_path, index=False)
 
-print("✅ Top weighted features extracted.")
-print("📁 Saved to: data/scoring_weights.csv")
-print("\n📐 Suggested Scoring Formula:")
-print(f"score = {score_formula}")
+        # How often a resample reproduces exactly the same top-10 feature set
+        same_set = ((ranks <= TOP_K) == (point_rank <= TOP_K)).all(axis=1).mean()
+        print(f"\n🎲 {args.bootstrap} bootstrap resamples: identical top-{TOP_K} set in {same_set:.1%} of them")
+        print(f"📁 Confidence intervals saved to: {ci_path}")
+        print(ci_table.head(TOP_K + 2).to_string(index=False))
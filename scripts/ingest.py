@@ -0,0 +1,303 @@
+# scripts/ingest.py
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from score_api import parse_record, score_parsed
+from scoring import load_kernel
+from session_log import open_session_log
+
+DEFAULT_SOURCE = "Remote"
+DEAD_LETTER_PATH = os.path.join("data", "ingest_dead_letter.ndjson")
+
+# What a malformed line can raise while being parsed (e.g. ["NO"] as smoking status, 10**400 as a vital)
+PARSE_ERRORS = (ValueError, TypeError, OverflowError)
+
+
+class ConnectionStats:
+    """Per-connection (or per-file) counters; `rate` is an EWMA of accepted records per second."""
+
+    def __init__(self, name):
+        self.name = name
+        self.records = 0
+        self.rejected = 0
+        self.bytes = 0
+        self.rate = None
+        self._last = (time.monotonic(), 0)
+
+    def tick(self, now, alpha=0.3):
+        then, records = self._last
+        if now > then:
+            current = (self.records - records) / (now - then)
+            self.rate = current if self.rate is None else alpha * current + (1 - alpha) * self.rate
+            self._last = (now, self.records)
+
+
+class IngestService:
+    """Parses vitals records from sockets / tailed files, scores them and logs them in batches.
+
+    Readers push parsed records onto a bounded queue; when it is full, `put` waits, so a
+    reader stops reading and TCP flow control slows the device down (backpressure). One
+    writer task drains the queue in batches of up to `batch_size` records (or whatever
+    arrived within `batch_wait_ms`), scores each batch with one vectorized call and
+    appends it with one bulk write on a dedicated thread. A failed write is retried with
+    exponential backoff; a batch that still cannot be scored or written goes to the
+    dead-letter NDJSON file, so one bad batch never stops the writer.
+    """
+
+    def __init__(self, session_log, kernel=None, queue_size=10_000, batch_size=1000, batch_wait_ms=50,
+                 write_retries=5, retry_delay=0.1, dead_letter_path=DEAD_LETTER_PATH):
+        self.session_log = session_log
+        self.kernel = kernel or load_kernel()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.write_retries = write_retries
+        self.retry_delay = retry_delay
+        self.dead_letter_path = dead_letter_path
+        self.stats = {}
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.batches = 0
+        self.dead_lettered = 0
+        self._last_report = (time.monotonic(), 0)
+        # Writes stay ordered and off the event loop
+        self._writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer")
+
+    # --- Parsing ---
+    async def feed(self, line, stats):
+        stats.bytes += len(line)
+        line = line.strip()
+        if not line:
+            return
+        try:
+            payload = json.loads(line)
+            records = payload if isinstance(payload, list) else [payload]
+            parsed = []
+            for record in records:
+                if isinstance(record, dict):
+                    record.setdefault("Source", DEFAULT_SOURCE)
+                parsed.append(parse_record(record))
+        except PARSE_ERRORS:
+            stats.rejected += 1
+            self.rejected += 1
+            return
+        for p in parsed:
+            await self.queue.put(p)
+        stats.records += len(parsed)
+        self.accepted += len(parsed)
+
+    def _open_stats(self, name):
+        stats = ConnectionStats(name)
+        self.stats[name] = stats
+        return stats
+
+    def _close_stats(self, stats):
+        self.stats.pop(stats.name, None)
+
+    # --- TCP listener: newline-delimited JSON, or HTTP POST with a JSON / NDJSON body ---
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        stats = self._open_stats(f"tcp:{peer[0]}:{peer[1]}" if peer else f"tcp:{id(writer)}")
+        try:
+            first = await reader.readline()
+            if first.startswith(b"POST "):
+                await self._serve_http(first, reader, writer, stats)
+            else:
+                line = first
+                while line:
+                    await self.feed(line, stats)
+                    line = await reader.readline()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, *PARSE_ERRORS):
+            pass
+        finally:
+            self._close_stats(stats)
+            writer.close()
+
+    async def _serve_http(self, request_line, reader, writer, stats):
+        # Minimal HTTP/1.1 (keep-alive, Content-Length bodies) for devices that can only POST
+        while request_line:
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            before = stats.records, stats.rejected
+            try:
+                json.loads(body)
+                lines = [body]
+            except PARSE_ERRORS:
+                lines = body.splitlines()  # NDJSON body
+            for line in lines:
+                await self.feed(line, stats)
+            accepted, rejected = stats.records - before[0], stats.rejected - before[1]
+            status = "202 Accepted" if accepted or not rejected else "400 Bad Request"
+            reply = json.dumps({"accepted": accepted, "rejected": rejected}).encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(reply)}\r\n\r\n".encode() + reply)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                return
+            request_line = await reader.readline()
+
+    # --- File-tail adapter: follows an NDJSON file, surviving truncation and rotation ---
+    async def tail(self, path, poll=0.2, from_start=False):
+        stats = self._open_stats(f"file:{path}")
+        f, inode = None, None
+        pending = b""
+        # Skip what is already there at start-up; files created or rotated in later are read whole
+        skip_existing = not from_start and os.path.exists(path)
+        while True:
+            if f is None:
+                try:
+                    f = open(path, "rb")
+                except OSError:  # not there (yet), or unreadable: try again later
+                    await asyncio.sleep(poll)
+                    continue
+                inode = os.fstat(f.fileno()).st_ino
+                if skip_existing:
+                    f.seek(0, os.SEEK_END)
+                    skip_existing = False
+            chunk = f.read(1 << 16)
+            if chunk:
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    await self.feed(line, stats)
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is None or st.st_ino != inode:
+                f.close()
+                f, pending = None, b""
+            elif st.st_size < f.tell():
+                f.seek(0)
+                pending = b""
+            await asyncio.sleep(poll)
+
+    # --- Writer: batch, score, bulk-append ---
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def writer(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _write(self, batch):
+        try:
+            rows = score_parsed(batch, self.kernel)
+        except Exception as exc:
+            # Scoring is deterministic: retrying the same records cannot help
+            self._dead_letter([{"PatientID": pid, "Source": source, "vitals": vitals, "Smoking_encoded": sc}
+                               for pid, source, vitals, sc in batch], exc)
+            return
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.write_retries + 1):
+            try:
+                await loop.run_in_executor(self._writer_pool, self.session_log.append_many, rows)
+            except Exception as exc:
+                if attempt == self.write_retries:
+                    self._dead_letter(rows, exc)
+                    return
+                print(f"⚠️ Session log write failed ({exc}); retry {attempt + 1}/{self.write_retries}", flush=True)
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            else:
+                self.written += len(rows)
+                self.batches += 1
+                return
+
+    def _dead_letter(self, items, exc):
+        # One NDJSON line per record, with the error, for replay once the cause is fixed
+        error = f"{type(exc).__name__}: {exc}"
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps({"error": error, "record": item}, ensure_ascii=False) + "\n" for item in items)
+        except OSError as write_exc:
+            print(f"❌ Lost {len(items)} records ({error}); dead-letter file not writable: {write_exc}", flush=True)
+        else:
+            print(f"❌ {len(items)} records moved to {self.dead_letter_path} ({error})", flush=True)
+        self.dead_lettered += len(items)
+
+    # --- Metrics ---
+    def report(self, top=5):
+        now = time.monotonic()
+        for s in self.stats.values():
+            s.tick(now)
+        busiest = sorted(self.stats.values(), key=lambda s: s.rate or 0, reverse=True)[:top]
+        then, accepted = self._last_report
+        total = (self.accepted - accepted) / (now - then) if now > then else 0.0
+        self._last_report = (now, self.accepted)
+        lines = [f"📡 {len(self.stats)} connections, {total:.0f} rec/s, queue {self.queue.qsize()}/{self.queue.maxsize}, "
+                 f"accepted {self.accepted}, rejected {self.rejected}, written {self.written} in {self.batches} batches, "
+                 f"dead-lettered {self.dead_lettered}"]
+        lines += [f"    {s.name}: {s.rate or 0:.1f} rec/s ({s.records} ok, {s.rejected} rejected, {s.bytes} B)" for s in busiest]
+        return "\n".join(lines)
+
+    async def reporter(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(self.report(), flush=True)
+
+
+async def serve(args):
+    service = IngestService(open_session_log(), queue_size=args.queue_size,
+                            batch_size=args.batch_size, batch_wait_ms=args.batch_wait_ms,
+                            write_retries=args.write_retries, dead_letter_path=args.dead_letter)
+    tasks = [asyncio.create_task(service.writer())]
+    if args.report:
+        tasks.append(asyncio.create_task(service.reporter(args.report)))
+    for path in args.tail:
+        tasks.append(asyncio.create_task(service.tail(path, from_start=args.from_start)))
+    server = await asyncio.start_server(service.handle_connection, args.host, args.port, backlog=4096)
+    print(f"✅ Ingesting on {args.host}:{args.port}" + (f", tailing {', '.join(args.tail)}" if args.tail else ""), flush=True)
+    async with server:
+        await asyncio.gather(server.serve_forever(), *tasks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest streamed vitals (TCP / HTTP / tailed files), score them and log them in batches.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tail", action="append", default=[], help="NDJSON file to follow (repeatable)")
+    parser.add_argument("--from-start", action="store_true", help="Read tailed files from the beginning")
+    parser.add_argument("--queue-size", type=int, default=10_000, help="Parsed records buffered before readers are paused")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-wait-ms", type=float, default=50)
+    parser.add_argument("--write-retries", type=int, default=5, help="Retries (with exponential backoff) of a failed batch write")
+    parser.add_argument("--dead-letter", default=DEAD_LETTER_PATH, help="NDJSON file for batches that cannot be scored or written")
+    parser.add_argument("--report", type=float, default=5.0, help="Seconds between metric reports (0 = off)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,49 @@
+# scripts/log_follower.py
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LogFollower:
+    """Applies rows appended to the session log - by this process or any other - to in-memory indexes.
+
+    Each worker process keeps its own indexes (recent scores, daily counters, patient trends).
+    They are loaded up to one cursor of the store's change feed (max row id for SQLite, byte
+    offset for CSV) and from then on are only fed by sync(), which reads the rows after the
+    cursor in commit order. Every row therefore reaches every worker's indexes exactly once,
+    whichever worker wrote it.
+    """
+
+    def __init__(self, session_log, indexes, cursor, min_interval=0.5):
+        self.session_log = session_log
+        self.indexes = list(indexes)
+        self.cursor = cursor
+        # Rows up to here were bulk-loaded; only later rows reach the indexes through add() (with ids)
+        self.start = cursor
+        # Readers call sync() on every request; the store is polled at most this often
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def sync(self, force=False):
+        if not force and time.monotonic() - self._last < self.min_interval:
+            return 0
+        applied = 0
+        with self._lock:
+            while True:
+                rows = self.session_log.changes(self.cursor)
+                if not rows:
+                    break
+                for row in rows:
+                    for index in self.indexes:
+                        index.add(row)
+                self.cursor = rows[-1]["id"]
+                applied += len(rows)
+            self._last = time.monotonic()
+        return applied
+
+    @contextmanager
+    def pinned(self):
+        # Holds sync() off while the caller reads the indexes; yields the cursor they reflect
+        with self._lock:
+            yield self.cursor
@@ -0,0 +1,291 @@
+# scripts/metrics.py
+import bisect
+import collections
+import contextlib
+import math
+import os
+import sys
+import threading
+import time
+
+# METRICS_ENABLED=0 turns every hook below into a no-op; METRICS_PROFILER=1 exposes /metrics/profile
+ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+PROFILER_ENABLED = os.environ.get("METRICS_PROFILER", "0") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(256 * 4 ** i for i in range(9))  # 256 B .. 16 MB
+MAX_PROFILE_SECONDS = 60
+MIN_PROFILE_INTERVAL_MS = 1
+
+# Label used for work done outside a request (start-up loads, the score micro-batcher's thread)
+BACKGROUND = "background"
+
+# Innermost frames of threads parked on a lock, queue or socket; left out of profiles unless ?idle=1
+IDLE_FRAMES = {"threading.py:wait", "selectors.py:select", "socket.py:accept", "socketserver.py:serve_forever"}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(v):
+    return "+Inf" if v == math.inf else repr(float(v))
+
+
+class Counter:
+    """Monotonic counter per label combination (Prometheus `counter`)."""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount, *labels):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    """Bucketed observations per label combination (Prometheus `histogram`)."""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, (list(counts), total)) for k, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+CALLBACK_SECONDS = Histogram(
+    "dash_callback_seconds", "Callback request latency, including Dash dispatch and JSON serialisation.", ["callback"])
+PHASE_SECONDS = Histogram(
+    "dash_callback_phase_seconds", "Time spent per phase of a callback request.", ["callback", "phase"])
+RESPONSE_BYTES = Histogram(
+    "dash_callback_response_bytes", "Size of the callback's JSON response.", ["callback"], buckets=BYTES_BUCKETS)
+ROWS_READ = Counter(
+    "session_log_rows_read_total", "Rows returned by session-log reads.", ["callback", "method"])
+ROWS_WRITTEN = Counter(
+    "session_log_rows_written_total", "Rows appended to the session log.", ["callback"])
+ERRORS = Counter(
+    "dash_callback_errors_total", "Callback requests answered with an HTTP error status.", ["callback"])
+
+REGISTRY = [CALLBACK_SECONDS, PHASE_SECONDS, RESPONSE_BYTES, ROWS_READ, ROWS_WRITTEN, ERRORS]
+
+# Per-thread state of the request being served: (callback name, start time, {phase: seconds})
+_local = threading.local()
+
+
+def _current():
+    return getattr(_local, "request", None)
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# --- Phases ---
+class _Phase:
+    __slots__ = ("name", "request", "start")
+
+    def __init__(self, name, request):
+        self.name, self.request = name, request
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        phases = self.request[2]
+        phases[self.name] = phases.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+_NOOP = contextlib.nullcontext()
+
+
+def phase(name):
+    """`with phase("figure"):` charges the block's time to that phase of the current callback."""
+    request = _current() if ENABLED else None
+    return _NOOP if request is None else _Phase(name, request)
+
+
+class InstrumentedLog:
+    """Session-log proxy: reads and writes are timed as the `io` phase and their rows counted."""
+
+    WRITES = {"append", "append_many"}
+
+    def __init__(self, session_log):
+        self._log = session_log
+
+    def __getattr__(self, name):
+        attr = getattr(self._log, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            with phase("io"):
+                result = attr(*args, **kwargs)
+            request = _current()
+            callback = request[0] if request else BACKGROUND
+            if name in self.WRITES:
+                ROWS_WRITTEN.inc(1 if name == "append" else len(args[0]), callback)
+            elif hasattr(result, "__len__") and not isinstance(result, str):
+                ROWS_READ.inc(len(result), callback, name)
+            return result
+
+        return call
+
+
+def instrument_log(session_log):
+    return InstrumentedLog(session_log) if ENABLED else session_log
+
+
+# --- Sampling profiler ---
+class SamplingProfiler:
+    """Samples every other thread's Python stack at a fixed interval; output is folded stacks.
+
+    Runs only while a capture is in progress, so it costs nothing the rest of the time.
+    Folded output ("a;b;c count" per line) loads into speedscope or flamegraph.pl.
+    """
+
+    def __init__(self, interval=0.005, idle=False):
+        self.interval = interval
+        self.idle = idle
+        self.stacks = collections.Counter()
+        self.samples = 0
+
+    def _sample(self, own):
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if not self.idle and stack[0] in IDLE_FRAMES:
+                continue
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, seconds):
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self._sample(own)
+            time.sleep(self.interval)
+        return self
+
+    def folded(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+_profile_lock = threading.Lock()
+
+
+# --- Flask wiring ---
+def instrument_server(server, callback_names, paths=("/api/score",)):
+    """Times Dash callback requests (plus `paths`) and serves /metrics in Prometheus text format.
+
+    `callback_names` maps a dispatch request's `output` string to the callback's name.
+    """
+    from flask import Response, g, request
+
+    if ENABLED:
+        @server.before_request
+        def _start_request():
+            if request.path == "/_dash-update-component":
+                body = request.get_json(silent=True) or {}
+                name = callback_names.get(body.get("output"), "unknown")
+            elif request.path in paths:
+                name = request.path
+            else:
+                return
+            g.metrics_request = _local.request = (name, time.perf_counter(), {})
+
+        @server.after_request
+        def _finish_request(response):
+            req = g.pop("metrics_request", None)
+            if req is not None:
+                name, start, phases = req
+                elapsed = time.perf_counter() - start
+                CALLBACK_SECONDS.observe(elapsed, name)
+                for label, seconds in phases.items():
+                    PHASE_SECONDS.observe(seconds, name, label)
+                # Whatever the phases do not cover: Dash dispatch, validation, JSON serialisation
+                PHASE_SECONDS.observe(max(elapsed - sum(phases.values()), 0.0), name, "other")
+                RESPONSE_BYTES.observe(response.content_length or 0, name)
+                if response.status_code >= 400:
+                    ERRORS.inc(1, name)
+            return response
+
+        @server.teardown_request
+        def _clear_request(exc):
+            _local.request = None
+
+    @server.route("/metrics")
+    def metrics():
+        if not ENABLED:
+            return Response("metrics disabled (METRICS_ENABLED=0)\n", status=404, mimetype="text/plain")
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    @server.route("/metrics/profile")
+    def profile():
+        # ?seconds=10&interval_ms=5[&idle=1] samples all threads for that long and returns folded stacks
+        if not PROFILER_ENABLED:
+            return Response("profiler disabled (set METRICS_PROFILER=1)\n", status=404, mimetype="text/plain")
+        try:
+            seconds = float(request.args.get("seconds", 10))
+            interval_ms = float(request.args.get("interval_ms", 5))
+        except ValueError:
+            return Response("seconds and interval_ms must be numbers\n", status=400, mimetype="text/plain")
+        if not (0 < seconds < math.inf and 0 <= interval_ms < math.inf):
+            return Response("seconds must be > 0 and interval_ms >= 0\n", status=400, mimetype="text/plain")
+        # Capped, so one request cannot pin a worker thread for long or sample in a busy loop
+        seconds = min(seconds, MAX_PROFILE_SECONDS)
+        interval = max(interval_ms, MIN_PROFILE_INTERVAL_MS) / 1000
+        if not _profile_lock.acquire(blocking=False):
+            return Response("a profile is already being captured\n", status=409, mimetype="text/plain")
+        try:
+            profiler = SamplingProfiler(interval, idle=request.args.get("idle") == "1").run(seconds)
+        finally:
+            _profile_lock.release()
+        return Response(profiler.folded(), mimetype="text/plain",
+                        headers={"X-Profile-Samples": str(profiler.samples)})
@@ -0,0 +1,205 @@
+# scripts/model_bundle.py
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+BUNDLE_DIR = os.environ.get("MODEL_BUNDLE", os.path.join("models", "bundle"))
+MANIFEST = "manifest.json"
+FORMAT = 1
+
+# Risk classifier classes are pain-severity bands (0-4, 5-7, 8-10), as in the original main.py
+CLASS_LABELS = ["Low", "Medium", "High"]
+
+# Array-valued classifier fields stored as .npy files (memory-mapped on load)
+TREE_ARRAYS = ["feature", "threshold", "left", "right", "default_left", "value", "roots", "tree_class"]
+
+_bundle = None
+
+
+class BundleError(RuntimeError):
+    """The model bundle is missing, incomplete or does not match its manifest."""
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _params_hash(manifest):
+    # Checksum of everything except the checksum itself: catches hand edits of the manifest
+    body = {k: v for k, v in manifest.items() if k != "params_sha256"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+class ScalerParams:
+    """The fitted StandardScaler's mean_ / scale_, without unpickling scikit-learn."""
+
+    def __init__(self, features, mean, scale):
+        self.feature_names_in_ = np.asarray(features)
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+
+class ModelBundle:
+    """Loaded bundle: scorer kernel, scaler parameters, feature lists and classifier arrays."""
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.scaler = ScalerParams(**manifest["scaler"])
+        self.kernel = dict(manifest["scoring"])
+        self.scoring_features = manifest["scoring_features"]
+        clf = manifest["classifier"]
+        self.trees = dict(arrays)
+        self.trees.update(
+            features=np.asarray(clf["features"]),
+            classes=np.asarray(clf["classes"]),
+            base_score=np.asarray(clf["base_score"], dtype=np.float64),
+            max_depth=np.int32(clf["max_depth"]),
+        )
+        self.class_labels = clf["class_labels"]
+
+    def changed_sources(self):
+        # Source pickles rewritten since the build (e.g. compile_scorer.py run without a rebuild) whose
+        # contents no longer match the checksum recorded in the manifest
+        built = os.path.getmtime(os.path.join(self.path, MANIFEST))
+        return [src for src, digest in self.manifest.get("sources", {}).items()
+                if os.path.exists(src) and os.path.getmtime(src) > built and _sha256(src) != digest]
+
+
+# --- Build ---
+def build_bundle(out_dir=BUNDLE_DIR, version=None):
+    import joblib
+    from scoring import KERNEL_PATH, NUMERICAL_COLS, SCALER_PATH, compile_kernel, load_scaler
+    from tree_model import TREES_PATH
+
+    scaler = load_scaler()
+    kernel = joblib.load(KERNEL_PATH) if os.path.exists(KERNEL_PATH) else compile_kernel(scaler)
+    weights = kernel.get("weights")
+    if weights is None:
+        # Kernels compiled before the weights were stored: unfold them with the scaler they were folded with
+        scale = dict(zip(NUMERICAL_COLS, scaler.scale_))
+        weights = [[f, c * scale.get(f, 1.0)] for f, c in zip(kernel["features"], kernel["coef"])]
+    if not os.path.exists(TREES_PATH):
+        raise BundleError(f"❌ {TREES_PATH} not found; run scripts/export_classifier.py first")
+    trees = dict(np.load(TREES_PATH, allow_pickle=False))
+
+    # Write next to the target and swap in at the end, so readers never see half a bundle
+    tmp = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(os.path.join(tmp, "classifier"))
+    arrays = {}
+    for name in TREE_ARRAYS:
+        rel = f"classifier/{name}.npy"
+        np.save(os.path.join(tmp, rel), np.ascontiguousarray(trees[name]))
+        arrays[name] = {"file": rel, "dtype": str(trees[name].dtype), "shape": list(trees[name].shape),
+                        "sha256": _sha256(os.path.join(tmp, rel))}
+
+    manifest = {
+        "format": FORMAT,
+        "version": version or time.strftime("%Y.%m.%d-%H%M%S"),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "scaler": {"features": list(NUMERICAL_COLS), "mean": [float(v) for v in scaler.mean_],
+                   "scale": [float(v) for v in scaler.scale_]},
+        "scoring": {"features": list(kernel["features"]), "coef": [float(c) for c in kernel["coef"]],
+                    "intercept": float(kernel["intercept"]), "low_max": float(kernel["low_max"]),
+                    "medium_max": float(kernel["medium_max"]), "weights": [[f, float(w)] for f, w in weights]},
+        "sources": {src: _sha256(src) if os.path.exists(src) else None for src in (SCALER_PATH, KERNEL_PATH)},
+        "scoring_features": list(joblib.load(os.path.join("models", "scoring_features.pkl"))),
+        "classifier": {"features": [str(f) for f in trees["features"]], "classes": trees["classes"].tolist(),
+                       "class_labels": CLASS_LABELS, "base_score": trees["base_score"].tolist(),
+                       "max_depth": int(trees["max_depth"]), "arrays": arrays},
+    }
+    manifest["params_sha256"] = _params_hash(manifest)
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp, out_dir)
+    return manifest
+
+
+# --- Load / verify ---
+def load_bundle(path=BUNDLE_DIR, verify=True):
+    """Read the manifest and memory-map the arrays; every problem found is reported at once."""
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise BundleError(f"❌ Model bundle not found: {manifest_path} (run: python scripts/model_bundle.py build)")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        raise BundleError(f"❌ Unsupported model bundle format {manifest.get('format')!r} in {manifest_path}")
+
+    problems = []
+    if verify and manifest.get("params_sha256") != _params_hash(manifest):
+        problems.append("manifest parameters do not match params_sha256")
+    arrays = {}
+    for name, spec in manifest["classifier"]["arrays"].items():
+        file = os.path.join(path, spec["file"])
+        if not os.path.exists(file):
+            problems.append(f"missing {spec['file']}")
+            continue
+        if verify and _sha256(file) != spec["sha256"]:
+            problems.append(f"checksum mismatch for {spec['file']}")
+            continue
+        arr = np.load(file, mmap_mode="r", allow_pickle=False)
+        if str(arr.dtype) != spec["dtype"] or list(arr.shape) != spec["shape"]:
+            problems.append(f"{spec['file']} is {arr.dtype}{list(arr.shape)}, manifest says {spec['dtype']}{spec['shape']}")
+            continue
+        arrays[name] = arr
+
+    scoring, scaler, clf = manifest["scoring"], manifest["scaler"], manifest["classifier"]
+    if len(scoring["features"]) != len(scoring["coef"]):
+        problems.append("scoring features and coefficients differ in length")
+    if not (len(scaler["features"]) == len(scaler["mean"]) == len(scaler["scale"])):
+        problems.append("scaler features, mean and scale differ in length")
+    if len(arrays) == len(TREE_ARRAYS):
+        if len(arrays["roots"]) != len(arrays["tree_class"]):
+            problems.append("classifier roots and tree_class differ in length")
+        if len(arrays["feature"]) and int(arrays["feature"].max()) >= len(clf["features"]):
+            problems.append("classifier splits on a feature index outside its feature list")
+
+    if problems:
+        raise BundleError(f"❌ Model bundle {path} (version {manifest.get('version')}) is invalid:\n  - "
+                          + "\n  - ".join(problems))
+    return ModelBundle(path, manifest, arrays)
+
+
+def active_bundle():
+    # The process-wide bundle, or None when none has been built (callers fall back to the pickles)
+    global _bundle
+    if _bundle is None and os.path.exists(os.path.join(BUNDLE_DIR, MANIFEST)):
+        _bundle = load_bundle(BUNDLE_DIR)
+    return _bundle
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or verify the versioned model bundle used for serving.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="Bundle scaler, scorer, feature lists and classifier arrays")
+    b.add_argument("--out", default=BUNDLE_DIR)
+    b.add_argument("--version")
+    v = sub.add_parser("verify", help="Check every artifact against the manifest")
+    v.add_argument("--path", default=BUNDLE_DIR)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            manifest = build_bundle(args.out, args.version)
+            print(f"✅ Model bundle {manifest['version']} written to {args.out}")
+        else:
+            start = time.perf_counter()
+            bundle = load_bundle(args.path)
+            print(f"✅ Model bundle {bundle.version} OK ({len(bundle.trees['roots'])} trees, "
+                  f"{len(bundle.kernel['features'])} score terms) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except BundleError as exc:
+        raise SystemExit(str(exc))
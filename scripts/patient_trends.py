@@ -0,0 +1,97 @@
+# scripts/patient_trends.py
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: indices of n_out points that keep the series' shape
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo = edges[i + 1]
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+class PatientTrendCache:
+    """LRU cache of per-patient score series, bounded by the total number of cached points."""
+
+    def __init__(self, session_log, max_points=200_000, display_points=500, upto=None):
+        self.session_log = session_log
+        self.max_points = max_points
+        self.display_points = display_points
+        self._lock = threading.Lock()
+        self._series = OrderedDict()  # pid -> (timestamps, epoch seconds, scores)
+        self._points = 0
+        # Change-feed cursor of the last row applied by add(); cache misses read the store up to it,
+        # so a row is never both loaded and added
+        self._upto = upto
+
+    def _evict(self):
+        while self._points > self.max_points and len(self._series) > 1:
+            _, (ts, _, _) = self._series.popitem(last=False)
+            self._points -= len(ts)
+
+    def _load(self, pid):
+        # Cache miss: indexed per-patient query against the store
+        hist = self.session_log.history(pid, upto=self._upto)
+        ts = hist["Timestamp"].tolist()
+        secs = np.array(ts, dtype="datetime64[s]").astype("int64").tolist()
+        series = (ts, secs, hist["Score"].astype(float).tolist())
+        self._series[pid] = series
+        self._points += len(ts)
+        self._evict()
+        return series
+
+    def _get(self, pid):
+        if pid in self._series:
+            self._series.move_to_end(pid)
+            return self._series[pid]
+        return self._load(pid)
+
+    def series(self, pid):
+        with self._lock:
+            ts, secs, scores = self._get(str(pid))
+            return list(ts), list(secs), list(scores)
+
+    def add(self, row):
+        # Incremental update: only patients already cached are touched
+        pid = str(row["PatientID"])
+        with self._lock:
+            if self._upto is not None and "id" in row:
+                self._upto = row["id"]
+            if pid not in self._series:
+                return
+            ts, secs, scores = self._series[pid]
+            sec = int(np.datetime64(row["Timestamp"], "s").astype("int64"))
+            i = len(ts) if not ts or row["Timestamp"] >= ts[-1] else bisect_right(ts, row["Timestamp"])
+            ts.insert(i, row["Timestamp"])
+            secs.insert(i, sec)
+            scores.insert(i, float(row["Score"]))
+            self._points += 1
+            self._series.move_to_end(pid)
+            self._evict()
+
+    def trend(self, pid):
+        # (timestamps, scores) for the chart, downsampled with LTTB past display_points
+        with self._lock:
+            ts, secs, scores = self._get(str(pid))
+            if len(ts) <= self.display_points:
+                return list(ts), list(scores)
+            keep = lttb(secs, scores, self.display_points)
+            return [ts[i] for i in keep], [scores[i] for i in keep]
@@ -0,0 +1,224 @@
+# scripts/pipeline.py
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from datasets import DATA_ARCHIVE, DATA_DIR, archive_member, dataset_path
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(DATA_DIR, ".pipeline_state.json")
+
+
+class Stage:
+    """One offline step: a script plus the files it reads and writes.
+
+    Bare names ("processed_data.csv") are datasets resolved through datasets.py;
+    anything with a slash ("models/scaler.pkl") is a plain path.
+    """
+
+    def __init__(self, name, script, inputs=(), outputs=(), args=(), code=()):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+        # Local modules the script imports; editing them invalidates the stage too
+        self.code = [script] + list(code)
+
+
+STAGES = [
+    Stage("clean", "cleaned_data.py",
+          inputs=["Health_observations.csv"], outputs=["cleaned_observations.csv"],
+          code=["datasets.py"]),
+    Stage("features", "enhance_features.py",
+          args=["--input", "cleaned_observations.csv"],
+          inputs=["cleaned_observations.csv"],
+          outputs=["processed_data.csv", "processed_data.parquet", "models/scaler.pkl"],
+          code=["datasets.py", "feature_pipeline.py"]),
+    Stage("sample", "sample_cases.py",
+          inputs=["processed_data.parquet", "processed_data.csv"], outputs=["sample_60_cases.csv"],
+          code=["datasets.py"]),
+    Stage("weights", "generate_weights.py",
+          inputs=["sample_60_cases.csv"], outputs=["scoring_weights.csv"],
+          code=["datasets.py"]),
+    Stage("scoring_features", "create_scoring_features.py",
+          outputs=["models/scoring_features.pkl"]),
+]
+
+
+def _is_path(name):
+    return "/" in name or os.sep in name
+
+
+class Fingerprinter:
+    """Content hashes, memoised by (size, mtime) so unchanged files are not re-read."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.used = set()
+
+    def _hash_stream(self, f):
+        h = hashlib.sha256()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+        return h.hexdigest()
+
+    def file(self, path):
+        if not os.path.exists(path):
+            return None
+        st = os.stat(path)
+        key = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        if key not in self.cache:
+            with open(path, "rb") as f:
+                self.cache[key] = self._hash_stream(f)
+        self.used.add(key)
+        return self.cache[key]
+
+    def item(self, name):
+        if _is_path(name):
+            return self.file(name)
+        path = dataset_path(name)
+        if os.path.exists(path):
+            return self.file(path)
+        member = archive_member(name)
+        if member is None:
+            return None
+        # Archive members: the archive's own hash + member name identifies the content
+        return hashlib.sha256(f"{self.file(DATA_ARCHIVE)}:{member}".encode()).hexdigest()
+
+    def stage(self, stage):
+        h = hashlib.sha256()
+        for label, names, resolve in (
+            ("code", stage.code, lambda n: self.file(os.path.join(SCRIPTS_DIR, n))),
+            ("in", stage.inputs, self.item),
+        ):
+            for n in names:
+                h.update(f"{label}:{n}={resolve(n)}\n".encode())
+        h.update(f"args:{stage.args}\n".encode())
+        return h.hexdigest()
+
+
+def _output_exists(name):
+    return os.path.exists(name if _is_path(name) else dataset_path(name))
+
+
+def load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {"stages": {}, "hashes": {}}
+
+
+def save_state(state):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_PATH)
+
+
+def dependencies(stages):
+    # stage -> stages producing one of its inputs
+    producers = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: {producers[i] for i in s.inputs if i in producers and producers[i] != s.name} for s in stages}
+
+
+def select(stages, targets):
+    # Requested stages plus everything upstream of them
+    if not targets:
+        return stages
+    deps = dependencies(stages)
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in deps:
+            raise SystemExit(f"❌ Unknown stage: {name}")
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in stages if s.name in wanted]
+
+
+def run_stage(stage):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join(SCRIPTS_DIR, stage.script), *stage.args],
+        capture_output=True, text=True,
+    )
+    return result, time.perf_counter() - start
+
+
+def run(stages, force=False, jobs=None, dry_run=False):
+    state = load_state()
+    fp = Fingerprinter(state.setdefault("hashes", {}))
+    deps = dependencies(stages)
+    pending = {s.name: s for s in stages}
+    done, failed, changed, running = set(), set(), set(), {}
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while pending or running:
+            # Launch every stage whose upstream stages have finished
+            for name, stage in list(pending.items()):
+                if deps[name] & failed:
+                    print(f"⏭️  {name}: skipped (upstream failed)")
+                    failed.add(name)
+                    del pending[name]
+                    continue
+                if not deps[name] <= done:
+                    continue
+                del pending[name]
+                fingerprint = fp.stage(stage)
+                previous = state["stages"].get(name, {}).get("fingerprint")
+                stale = force or fingerprint != previous or not all(_output_exists(o) for o in stage.outputs)
+                # A real run compares content hashes; a dry run can only assume upstream reruns change things
+                if not stale and not (dry_run and deps[name] & changed):
+                    print(f"✅ {name}: up to date")
+                    done.add(name)
+                    continue
+                if dry_run:
+                    print(f"🔁 {name}: would run {stage.script}")
+                    done.add(name)
+                    changed.add(name)
+                    continue
+                print(f"▶️  {name}: running {stage.script}")
+                running[pool.submit(run_stage, stage)] = (stage, fingerprint)
+
+            if not running:
+                if pending and not any(deps[n] <= done for n in pending):
+                    raise SystemExit(f"❌ Unresolvable stage dependencies: {sorted(pending)}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, fingerprint = running.pop(future)
+                result, elapsed = future.result()
+                if result.returncode != 0:
+                    print(f"❌ {stage.name}: failed after {elapsed:.1f}s\n{result.stderr}")
+                    failed.add(stage.name)
+                    continue
+                print(f"✅ {stage.name}: done in {elapsed:.1f}s")
+                changed.add(stage.name)
+                state["stages"][stage.name] = {"fingerprint": fingerprint, "finished": time.strftime("%Y-%m-%d %H:%M:%S")}
+                done.add(stage.name)
+
+    if not dry_run:
+        # Keep only hashes of files seen in this run
+        state["hashes"] = {k: v for k, v in state["hashes"].items() if k in fp.used}
+        save_state(state)
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the offline data pipeline, skipping stages whose inputs and code are unchanged.")
+    parser.add_argument("stages", nargs="*", help=f"Stages to bring up to date (default: all of {[s.name for s in STAGES]})")
+    parser.add_argument("--force", action="store_true", help="Re-run selected stages even if they are up to date")
+    parser.add_argument("--jobs", type=int, help="Maximum stages run in parallel (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would run")
+    args = parser.parse_args()
+
+    ok = run(select(STAGES, args.stages), force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    sys.exit(0 if ok else 1)
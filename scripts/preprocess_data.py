@@ -1,34 +1,14 @@
 # scripts/preprocess_data.py
-import pandas as pd
+import argparse
 import os
 from sklearn.preprocessing import StandardScaler
 import joblib
+from datasets import DATA_DIR, PROCESSED_CSV, PROCESSED_PARQUET, read_csv, write_parquet
+from feature_pipeline import move_target_last, output_paths, run_chunked
 
-# Load original data
-data_path = os.path.join("data", "Health_observations.csv")
-df = pd.read_csv(data_path)
-df.columns = df.columns.str.strip()
-
-# --- Feature Engineering ---
-df['BMI'] = df['Body Weight'] / ((df['Body Height'] / 100) ** 2)
-
-# Smoking status mapping (based on actual unique values)
-smoking_map = {
-    'NO': 'NO',
-    'EX': 'EX',
-    'Smokes tobacco daily (finding)': 'YES'
-}
-df['Tobacco smoking status'] = df['Tobacco smoking status'].map(smoking_map)
-
-# Encode mapped smoking status
-encode_map = {'NO': 0, 'EX': 1, 'YES': 2}
-df['Smoking_encoded'] = df['Tobacco smoking status'].map(encode_map)
-
-# Drop original column
-df.drop(columns=['Tobacco smoking status'], inplace=True)
-
-# Drop rows with any missing values after mapping
-df.dropna(inplace=True)
+data_name = "Health_observations.csv"
+processed_path = PROCESSED_CSV
+target_col = "Pain severity"
 
 # Scale numerical columns
 numerical_cols = [
@@ -41,19 +21,67 @@ numerical_cols = [
     'BMI'
 ]
 
-scaler = StandardScaler()
-df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
 
-# Move target column to end
-target_col = "Pain severity"
-cols = [col for col in df.columns if col != target_col] + [target_col]
-df = df[cols]
+def engineer_features(df):
+    df = df.copy()
+
+    # --- Feature Engineering ---
+    df['BMI'] = df['Body Weight'] / ((df['Body Height'] / 100) ** 2)
+
+    # Smoking status mapping (based on actual unique values)
+    smoking_map = {
+        'NO': 'NO',
+        'EX': 'EX',
+        'Smokes tobacco daily (finding)': 'YES'
+    }
+    df['Tobacco smoking status'] = df['Tobacco smoking status'].map(smoking_map)
+
+    # Encode mapped smoking status
+    encode_map = {'NO': 0, 'EX': 1, 'YES': 2}
+    df['Smoking_encoded'] = df['Tobacco smoking status'].map(encode_map)
+
+    # Drop original column
+    df.drop(columns=['Tobacco smoking status'], inplace=True)
+
+    # Drop rows with any missing values after mapping
+    df.dropna(inplace=True)
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Basic feature engineering + scaling for the health observations.")
+    parser.add_argument("--input", default=data_name, help="Dataset to read (e.g. cleaned_observations.csv)")
+    parser.add_argument("--chunksize", type=int, help="Stream the input in chunks of this many rows (two passes)")
+    parser.add_argument("--format", choices=["csv", "parquet", "both"], default="both",
+                        help="Processed dataset format (Parquet uses compact float32 / bool / int8 columns)")
+    args = parser.parse_args()
+    csv_out, parquet_out = output_paths(args.format, processed_path, PROCESSED_PARQUET)
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    if args.chunksize:
+        scaler, rows = run_chunked(args.input, engineer_features, numerical_cols, csv_out, target_col, args.chunksize, parquet_out)
+        print(f"🔁 Streamed {rows} rows in chunks of {args.chunksize}")
+    else:
+        # Load original data
+        df = read_csv(args.input)
+        df.columns = df.columns.str.strip()
+        df = engineer_features(df)
+
+        scaler = StandardScaler()
+        df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
+
+        # Move target column to end
+        df = move_target_last(df, target_col)
+        if csv_out:
+            df.to_csv(csv_out, index=False)
+        if parquet_out:
+            write_parquet(df, parquet_out)
 
-# Save processed data and scaler
-processed_path = os.path.join("data", "processed_data.csv")
-df.to_csv(processed_path, index=False)
-joblib.dump(scaler, "models/scaler.pkl")
+    # Save scaler
+    joblib.dump(scaler, "models/scaler.pkl")
 
-print("✅ Feature engineering and scaling complete.")
-print(f"📁 Processed dataset saved to {processed_path}")
-print("📦 Scaler saved to models/scaler.pkl")
+    print("✅ Feature engineering and scaling complete.")
+    for out in (csv_out, parquet_out):
+        if out:
+            print(f"📁 Processed dataset saved to {out}")
+    print("📦 Scaler saved to models/scaler.pkl")
@@ -0,0 +1,118 @@
+# scripts/recent_scores.py
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+# Window cut-offs are compared as strings at minute resolution, as the pages always did
+MINUTE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class RecentScores:
+    """Per-Source, time-ordered window of recent scores kept in process memory."""
+
+    def __init__(self, horizon=timedelta(hours=6)):
+        # Rows older than `horizon` are dropped; it must cover the widest page window
+        self.horizon = horizon
+        self._lock = threading.Lock()
+        self._ts = {}      # source -> sorted list of timestamp strings
+        self._rows = {}    # source -> rows, aligned with _ts
+        self._start = {}   # source -> index of the first row still inside the horizon
+        self._floor = {}   # source -> cut-off of the last compaction (older rows are gone)
+        # source -> rows fed by add() and their log ids: the change feed delivers them in id order
+        self._arrivals = {}
+        self._arrival_ids = {}
+        self._arrival_start = {}
+        # Next time add() expires every source, so sources whose page is never rendered stay bounded too
+        self._next_expiry = datetime.min
+
+    def load(self, session_log, now=None, upto=None):
+        # Cold start from the backing store: only the rows inside the horizon (up to cursor `upto`) are read
+        now = now or datetime.now()
+        recent = session_log.since((now - self.horizon).strftime(MINUTE_FORMAT), upto=upto)
+        with self._lock:
+            self._ts, self._rows, self._start, self._floor = {}, {}, {}, {}
+            self._arrivals, self._arrival_ids, self._arrival_start = {}, {}, {}
+            for row in recent.to_dict("records"):
+                self._insert(row)
+        return self
+
+    def add(self, row, now=None):
+        now = now or datetime.now()
+        with self._lock:
+            self._insert(row)
+            if "id" in row and isinstance(row.get("Source"), str):
+                self._arrivals.setdefault(row["Source"], []).append(row)
+                self._arrival_ids.setdefault(row["Source"], []).append(row["id"])
+            # Cut-offs have minute resolution, so expiring once a minute is as tight as it gets
+            if now >= self._next_expiry:
+                for source in self._ts:
+                    self._expire(source, now)
+                self._next_expiry = now + timedelta(minutes=1)
+
+    def _insert(self, row):
+        source = row.get("Source")
+        if not isinstance(source, str):
+            return
+        ts = self._ts.setdefault(source, [])
+        rows = self._rows.setdefault(source, [])
+        self._start.setdefault(source, 0)
+        if not ts or row["Timestamp"] >= ts[-1]:
+            ts.append(row["Timestamp"])
+            rows.append(row)
+        else:
+            # Late arrival: keep both lists time-ordered
+            i = bisect_right(ts, row["Timestamp"])
+            ts.insert(i, row["Timestamp"])
+            rows.insert(i, row)
+
+    def _expire(self, source, now):
+        ts, start = self._ts[source], self._start[source]
+        cutoff = (now - self.horizon).strftime(MINUTE_FORMAT)
+        start = bisect_left(ts, cutoff, lo=start)
+        # Compact once the expired prefix dominates, keeping expiry amortised O(1) per row
+        if start > len(ts) // 2:
+            del ts[:start]
+            del self._rows[source][:start]
+            self._floor[source] = cutoff
+            start = 0
+        self._start[source] = start
+        # Arrivals are id-ordered, not time-ordered: trim the expired front, late rows go with it later
+        arrivals = self._arrivals.get(source)
+        if arrivals:
+            n = self._arrival_start.get(source, 0)
+            while n < len(arrivals) and arrivals[n]["Timestamp"] < cutoff:
+                n += 1
+            if n > len(arrivals) // 2:
+                del arrivals[:n]
+                del self._arrival_ids[source][:n]
+                n = 0
+            self._arrival_start[source] = n
+
+    def window(self, source, hours, now=None):
+        # Rows for `source` with Timestamp >= now - hours
+        now = now or datetime.now()
+        cutoff = (now - timedelta(hours=hours)).strftime(MINUTE_FORMAT)
+        with self._lock:
+            if source not in self._ts:
+                return []
+            self._expire(source, now)
+            lo = bisect_left(self._ts[source], cutoff, lo=self._start[source])
+            return self._rows[source][lo:]
+
+    def arrived(self, source, after, upto):
+        # Rows fed by add() with after < id <= upto, in log order
+        with self._lock:
+            ids = self._arrival_ids.get(source)
+            if not ids:
+                return []
+            return self._arrivals[source][bisect_right(ids, after):bisect_right(ids, upto)]
+
+    def between(self, source, start, end):
+        # Rows with start <= Timestamp < end; None if some of them were already compacted away
+        with self._lock:
+            if start < self._floor.get(source, ""):
+                return None
+            ts = self._ts.get(source)
+            if not ts:
+                return []
+            return self._rows[source][bisect_left(ts, start):bisect_left(ts, end)]
@@ -0,0 +1,50 @@
+# scripts/risk_counters.py
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+RISK_LEVELS = ["Low", "Medium", "High"]
+DAY_FORMAT = "%Y-%m-%d"
+
+
+class DailyRiskCounters:
+    """Today's Low/Medium/High counts per Source, updated as scores are logged."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.day = None
+        self._counts = {}  # source -> Counter(risk -> n)
+
+    def load(self, session_log, now=None, upto=None):
+        # Cold start: one grouped count over today's rows in the store (up to cursor `upto`)
+        now = now or datetime.now()
+        day = now.strftime(DAY_FORMAT)
+        counts = {}
+        for source, risk, n in session_log.risk_counts(day, (now + timedelta(days=1)).strftime(DAY_FORMAT), upto=upto):
+            counts.setdefault(source, Counter())[risk] += n
+        with self._lock:
+            self.day, self._counts = day, counts
+        return self
+
+    def _rollover(self, day):
+        if self.day is None or day > self.day:
+            self.day, self._counts = day, {}
+
+    def add(self, row):
+        day = row["Timestamp"][:10]
+        with self._lock:
+            self._rollover(day)
+            if day == self.day:
+                self._counts.setdefault(row.get("Source"), Counter())[row["Risk"]] += 1
+
+    def counts(self, source=None, now=None):
+        # Risk -> count for today, for one Source or summed over all of them
+        day = (now or datetime.now()).strftime(DAY_FORMAT)
+        with self._lock:
+            self._rollover(day)
+            if source is not None:
+                return dict(self._counts.get(source, Counter()))
+            total = Counter()
+            for c in self._counts.values():
+                total.update(c)
+            return dict(total)
@@ -1,29 +1,67 @@
 # scripts/sample_cases.py
+import argparse
+
+import numpy as np
 import pandas as pd
-import os
+from datasets import iter_processed, output_path, read_csv
+
+KEY = "_reservoir_key"
+
+
+class StratifiedReservoir:
+    """Up to `quota` uniformly random rows per stratum, from one pass over any number of chunks.
+
+    Every row gets a random key and each stratum keeps its `quota` smallest keys (bottom-k
+    reservoir), so memory is bounded by the sample plus one chunk. Keys are drawn in row order
+    from a single seeded generator: the sample depends on the seed, not on the chunk size.
+    """
+
+    def __init__(self, column, quota, seed=42):
+        self.column = column
+        self.quota = quota
+        self.rng = np.random.default_rng(seed)
+        self.kept = None
+        self.rows = 0
 
-# Load your latest processed dataset
-df = pd.read_csv("data/processed_data.csv")
+    def add(self, chunk):
+        if self.column not in chunk.columns:
+            raise KeyError(f"❌ '{self.column}' column not found!")
+        chunk = chunk.assign(**{KEY: self.rng.random(len(chunk))})
+        self.rows += len(chunk)
+        pool = chunk if self.kept is None else pd.concat([self.kept, chunk], ignore_index=True)
+        self.kept = (pool.sort_values(KEY, kind="stable")
+                     .groupby(self.column, dropna=False, sort=False)
+                     .head(self.quota))
 
-# Make sure target column is present
-assert 'Pain severity' in df.columns, "❌ 'Pain severity' column not found!"
+    def sample(self):
+        if self.kept is None:
+            return pd.DataFrame()
+        # Key order is itself a seeded shuffle of the combined sample
+        return self.kept.sort_values(KEY).drop(columns=KEY).reset_index(drop=True)
 
-# Grouped sampling: get up to 5 records from each severity level (0 to 10)
-sample_df = pd.DataFrame()
 
-for severity in range(11):
-    group = df[df['Pain severity'] == severity]
-    if not group.empty:
-        count = min(5, len(group))
-        sample_df = pd.concat([sample_df, group.sample(n=count, random_state=42)])
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stratified random sample (per-stratum reservoir, single pass).")
+    parser.add_argument("--input", help="Dataset to sample (default: processed data, Parquet copy if present)")
+    parser.add_argument("--column", default="Pain severity", help="Stratum column")
+    parser.add_argument("--quota", type=int, default=5, help="Rows kept per stratum")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows read per chunk")
+    parser.add_argument("--output", default="sample_60_cases.csv", help="Output dataset name")
+    args = parser.parse_args()
 
-# Shuffle the combined sample
-sample_df = sample_df.sample(frac=1, random_state=42).reset_index(drop=True)
+    chunks = read_csv(args.input, chunksize=args.chunksize) if args.input else iter_processed(args.chunksize)
+    reservoir = StratifiedReservoir(args.column, args.quota, args.seed)
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.strip()
+        reservoir.add(chunk)
+    sample_df = reservoir.sample()
 
-# Save the sample to a CSV file
-output_path = "data/sample_60_cases.csv"
-sample_df.to_csv(output_path, index=False)
+    # Save the sample to a CSV file
+    sample_path = output_path(args.output)
+    sample_df.to_csv(sample_path, index=False)
 
-print("✅ Sampled 60 cases saved successfully.")
-print(f"📁 File saved at: {output_path}")
-print(f"🔢 Rows: {sample_df.shape[0]} (Target levels: {sample_df['Pain severity'].nunique()} present)")
+    print(f"✅ Sampled {len(sample_df)} of {reservoir.rows} rows (up to {args.quota} per '{args.column}').")
+    print(f"📁 File saved at: {sample_path}")
+    if len(sample_df):
+        print(f"🔢 Rows: {sample_df.shape[0]} (Strata present: {sample_df[args.column].nunique(dropna=False)})")
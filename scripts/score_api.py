@@ -0,0 +1,154 @@
+# scripts/score_api.py
+import math
+import queue
+import threading
+import time
+from concurrent import futures
+from datetime import datetime
+
+import numpy as np
+from flask import jsonify, request
+
+from scoring import RAW_COLS, SMOKING_CODES, score_arrays
+
+SMOKING_FIELD = "Tobacco smoking status"
+SOURCES = ("InPerson", "Remote")
+# Divisors in the derived features
+POSITIVE_COLS = ("Body Height", "Body Weight", "Diastolic Blood Pressure")
+
+
+def parse_record(record):
+    """Validate one JSON record; returns (PatientID, Source, vitals list, smoking code)."""
+    if not isinstance(record, dict):
+        raise ValueError("each record must be a JSON object")
+    missing = [f for f in ("PatientID", "Source", *RAW_COLS, SMOKING_FIELD) if record.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    # Type checks before the lookups: a list or dict value would raise TypeError, not ValueError
+    if not isinstance(record["Source"], str) or record["Source"] not in SOURCES:
+        raise ValueError(f"Source must be one of {', '.join(SOURCES)}")
+    if not isinstance(record[SMOKING_FIELD], str) or record[SMOKING_FIELD] not in SMOKING_CODES:
+        raise ValueError(f"{SMOKING_FIELD} must be one of NO, EX, YES")
+    vitals = []
+    for col in RAW_COLS:
+        value = record[col]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{col} must be a finite number")
+        try:
+            value = float(value)  # ints beyond float range raise OverflowError
+        except OverflowError:
+            raise ValueError(f"{col} must be a finite number") from None
+        if not math.isfinite(value):
+            raise ValueError(f"{col} must be a finite number")
+        if col in POSITIVE_COLS and value <= 0:
+            raise ValueError(f"{col} must be positive")
+        vitals.append(value)
+    return str(record["PatientID"]), record["Source"], vitals, float(SMOKING_CODES[record[SMOKING_FIELD]])
+
+
+def score_parsed(parsed, kernel=None):
+    # Session-log rows for a list of parse_record results, scored in one vectorized call
+    vitals = np.array([p[2] for p in parsed], dtype=float)
+    sc = np.array([p[3] for p in parsed], dtype=float)
+    scores, risks = score_arrays(*vitals.T, sc, kernel=kernel)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        {"PatientID": pid, "Timestamp": now, "Score": float(score), "Risk": risk, "Source": source}
+        for (pid, source, _, _), score, risk in zip(parsed, scores, risks)
+    ]
+
+
+class MicroBatcher:
+    """Collects records from concurrent requests and scores them together.
+
+    A batch closes when it holds `max_batch` records or `max_wait_ms` after its first
+    record arrived, whichever comes first. Each batch is scored with one vectorized call
+    and handed to `log_many` as one bulk write; every request then gets its own rows back.
+    A future cancelled before its batch starts (the client gave up) is dropped, not logged.
+    """
+
+    def __init__(self, kernel, log_many, max_batch=256, max_wait_ms=2.0):
+        self.kernel = kernel
+        self.log_many = log_many
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="score-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, parsed):
+        future = futures.Future()
+        self._queue.put((parsed, future))
+        return future
+
+    def _collect(self):
+        items = [self._queue.get()]
+        count = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            count += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            items = [(parsed, future) for parsed, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not items:
+                continue
+            try:
+                results = self._score([p for parsed, _ in items for p in parsed])
+            except Exception as exc:
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+            start = 0
+            for parsed, future in items:
+                future.set_result(results[start:start + len(parsed)])
+                start += len(parsed)
+
+    def _score(self, parsed):
+        rows = score_parsed(parsed, self.kernel)
+        self.log_many(rows)
+        return rows
+
+
+def register_score_api(server, batcher, timeout=10.0):
+    # POST /api/score: one record -> one result object, an array -> an array of results
+    @server.route("/api/score", methods=["POST"])
+    def api_score():
+        payload = request.get_json(silent=True)
+        if payload is None:
+            return jsonify(error="expected a JSON object or array"), 400
+        records = payload if isinstance(payload, list) else [payload]
+        if not records:
+            return jsonify([])
+        parsed = []
+        for i, record in enumerate(records):
+            try:
+                parsed.append(parse_record(record))
+            except ValueError as exc:
+                return jsonify(error=f"record {i}: {exc}" if isinstance(payload, list) else str(exc)), 400
+        future = batcher.submit(parsed)
+        try:
+            try:
+                rows = future.result(timeout=timeout)
+            except futures.TimeoutError:
+                # Still queued: cancel it, so the batcher never logs it and a retry cannot duplicate rows
+                if future.cancel():
+                    return jsonify(error="scoring timed out; nothing was logged, retry"), 503
+                # Already in a batch being scored and logged: give the write the same time again
+                rows = future.result(timeout=timeout)
+        except futures.TimeoutError:
+            return jsonify(status="accepted", detail="still being logged; do not retry"), 202
+        except Exception as exc:
+            return jsonify(error=f"scoring failed: {exc}"), 503
+        return jsonify(rows if isinstance(payload, list) else rows[0])
+
+    return api_score
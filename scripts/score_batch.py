@@ -0,0 +1,68 @@
+# scripts/score_batch.py
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from scoring import score_batch
+
+
+def read_chunks(path, chunksize):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def write_chunks(chunks, path):
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(path, mode="w" if header else "a", header=header, index=False)
+            header = False
+
+
+def score_file(input_path, output_path, chunksize=500_000):
+    rows = 0
+
+    def scored():
+        nonlocal rows
+        for chunk in read_chunks(input_path, chunksize):
+            chunk.columns = chunk.columns.str.strip()
+            chunk["Score"], chunk["Risk"] = score_batch(chunk)
+            rows += len(chunk)
+            yield chunk
+
+    write_chunks(scored(), output_path)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of vitals with the rule-based risk score.")
+    parser.add_argument("input", help="CSV or .parquet file with raw vitals and smoking status")
+    parser.add_argument("output", help="CSV or .parquet file to write (input columns + Score + Risk)")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="Rows held in memory at once")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    start = time.perf_counter()
+    n = score_file(args.input, args.output, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored {n} rows in {elapsed:.1f}s ({n / max(elapsed, 1e-9) * 60:,.0f} rows/min)")
+    print(f"📁 Scores saved to {args.output}")
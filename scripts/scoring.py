@@ -0,0 +1,189 @@
+# scripts/scoring.py
+import os
+
+import numpy as np
+import pandas as pd
+
+SCALER_PATH = "models/scaler.pkl"
+KERNEL_PATH = "models/compiled_scorer.pkl"
+
+# Columns scaled by models/scaler.pkl, in the order the scaler was fitted on
+NUMERICAL_COLS = [
+    "Body Height", "Body Weight", "Diastolic Blood Pressure", "Systolic Blood Pressure",
+    "Heart rate", "Respiratory rate", "BMI", "Pulse_Pressure", "BP_Ratio", "HRxRR",
+    "HeartStress", "SmokingBMI", "Pulse_HR", "BP_Smoking"
+]
+
+# Raw vitals a record must carry to be scored
+RAW_COLS = [
+    "Body Height", "Body Weight", "Diastolic Blood Pressure", "Systolic Blood Pressure",
+    "Heart rate", "Respiratory rate"
+]
+
+# Rule-based score weights (see data/scoring_weights.csv); order matters for the sum
+WEIGHTS = [
+    ("SmokingBMI", 0.141), ("Smoking_encoded", 0.138), ("BP_Smoking", 0.112),
+    ("Body Height", 0.110), ("Body Weight", 0.099), ("BMI", 0.084),
+    ("Systolic Blood Pressure", 0.083), ("HeartStress", 0.079),
+    ("Respiratory rate", 0.077), ("BMI_Category_Overweight", 0.077)
+]
+
+# Risk bands: score <= LOW_MAX is Low, <= MEDIUM_MAX is Medium, anything above is High
+LOW_MAX = 2.5
+MEDIUM_MAX = 4.0
+
+SMOKING_CODES = {"NO": 0, "EX": 1, "YES": 2, "Smokes tobacco daily (finding)": 2}
+
+_scaler = None
+_kernel = None
+
+
+def load_scaler():
+    global _scaler
+    if _scaler is None:
+        import joblib
+        _scaler = joblib.load(SCALER_PATH)
+    return _scaler
+
+
+def encode_smoking(values):
+    return pd.Series(values).map(SMOKING_CODES).to_numpy(dtype=float)
+
+
+# --- Feature Engineering (same safeguards as the calculator) ---
+# guards=False gives enhance_features.py's formulas instead (signed pulse pressure, unclamped
+# ratio and Pulse_HR): what the classifier was trained on
+def derive_features(h, w, dbp, sbp, hr, rr, sc, guards=True):
+    h, w, dbp, sbp, hr, rr, sc = (np.asarray(a, dtype=float) for a in (h, w, dbp, sbp, hr, rr, sc))
+    hm = h / 100
+    bmi = w / (hm * hm)
+    pp = np.abs(sbp - dbp) if guards else sbp - dbp
+    ratio = np.maximum(sbp / dbp, 0.01) if guards else sbp / dbp
+    return {
+        "Body Height": h, "Body Weight": w, "Diastolic Blood Pressure": dbp,
+        "Systolic Blood Pressure": sbp, "Heart rate": hr, "Respiratory rate": rr,
+        "BMI": bmi, "Pulse_Pressure": pp, "BP_Ratio": ratio, "HRxRR": hr * rr,
+        "HeartStress": hr / bmi, "SmokingBMI": sc * bmi, "Pulse_HR": np.maximum(pp * hr, 0) if guards else pp * hr,
+        "BP_Smoking": ratio * sc, "Smoking_encoded": sc,
+        "BMI_Category_Overweight": (bmi >= 25).astype(float),
+    }
+
+
+# --- Reference path: standardise with the scaler, then take the weighted sum ---
+def reference_scores(feats, scaler=None, weights=WEIGHTS):
+    scaler = scaler or load_scaler()
+    v = dict(feats)
+    for col, mean, scale in zip(NUMERICAL_COLS, scaler.mean_, scaler.scale_):
+        v[col] = (feats[col] - mean) / scale
+
+    total = None
+    for col, weight in weights:
+        term = weight * v[col]
+        total = term if total is None else total + term
+    return total
+
+
+# --- Compiled path: scaler folded into the weights, score = intercept + coef . x ---
+def compile_kernel(scaler=None, weights=WEIGHTS, low_max=LOW_MAX, medium_max=MEDIUM_MAX):
+    scaler = scaler or load_scaler()
+    mean = dict(zip(NUMERICAL_COLS, scaler.mean_))
+    scale = dict(zip(NUMERICAL_COLS, scaler.scale_))
+    coef, intercept = [], 0.0
+    for col, weight in weights:
+        if col in scale:
+            coef.append((col, float(weight / scale[col])))
+            intercept -= float(weight * mean[col] / scale[col])
+        else:
+            coef.append((col, float(weight)))
+    return {
+        "features": [c for c, _ in coef],
+        "coef": [w for _, w in coef],
+        "intercept": intercept,
+        "low_max": float(low_max),
+        "medium_max": float(medium_max),
+        "weights": [[col, float(weight)] for col, weight in weights],
+    }
+
+
+def load_kernel():
+    # Serving order: model bundle, then the compiled pickle, then compile from scaler.pkl. A pickle
+    # recompiled after the bundle was built wins (with a warning) until the bundle is rebuilt
+    global _kernel
+    if _kernel is None:
+        from model_bundle import active_bundle
+        bundle = active_bundle()
+        if bundle is not None:
+            _kernel = bundle.kernel
+            changed = bundle.changed_sources()
+            if KERNEL_PATH in changed:
+                import joblib
+                _kernel = joblib.load(KERNEL_PATH)
+            if changed:
+                print(f"⚠️ {', '.join(changed)} changed after model bundle {bundle.version} was built; scoring with "
+                      f"{KERNEL_PATH if KERNEL_PATH in changed else 'the bundle'} "
+                      "(rebuild it: python scripts/model_bundle.py build)")
+        elif os.path.exists(KERNEL_PATH):
+            import joblib
+            _kernel = joblib.load(KERNEL_PATH)
+        else:
+            _kernel = compile_kernel()
+    return _kernel
+
+
+def kernel_scores(feats, kernel=None):
+    k = kernel or load_kernel()
+    total = np.full(len(feats["BMI"]), k["intercept"])
+    for col, c in zip(k["features"], k["coef"]):
+        total = total + c * feats[col]
+    return total
+
+
+def classify(scores, kernel=None):
+    k = kernel or load_kernel()
+    scores = np.asarray(scores, dtype=float)
+    risks = np.where(scores <= k["low_max"], "Low", np.where(scores <= k["medium_max"], "Medium", "High")).astype(object)
+    risks[np.isnan(scores)] = None
+    return risks
+
+
+def score_batch(df, kernel=None):
+    # Accept either the raw smoking status column or an already encoded one
+    if "Smoking_encoded" in df.columns:
+        sc = df["Smoking_encoded"].to_numpy(dtype=float)
+    else:
+        sc = encode_smoking(df["Tobacco smoking status"])
+    return score_arrays(*(df[c].to_numpy(dtype=float) for c in RAW_COLS), sc, kernel=kernel)
+
+
+def score_arrays(h, w, dbp, sbp, hr, rr, sc, kernel=None):
+    # Rounded scores + risk bands for column arrays (the core of score_batch, without pandas)
+    feats = derive_features(h, w, dbp, sbp, hr, rr, sc)
+    scores = np.round(kernel_scores(feats, kernel), 2)
+    return scores, classify(scores, kernel)
+
+
+# Scalar twin of score_batch for one patient: plain float arithmetic in the same
+# order as the vectorized path, so both give identical scores in microseconds
+def score_one(h, w, dbp, sbp, hr, rr, smoke, kernel=None):
+    k = kernel or load_kernel()
+    sc = float(SMOKING_CODES[smoke])
+    h, w, dbp, sbp, hr, rr = float(h), float(w), float(dbp), float(sbp), float(hr), float(rr)
+    hm = h / 100
+    bmi = w / (hm * hm)
+    pp = abs(sbp - dbp)
+    ratio = max(sbp / dbp, 0.01)
+    x = {
+        "Body Height": h, "Body Weight": w, "Diastolic Blood Pressure": dbp,
+        "Systolic Blood Pressure": sbp, "Heart rate": hr, "Respiratory rate": rr,
+        "BMI": bmi, "Pulse_Pressure": pp, "BP_Ratio": ratio, "HRxRR": hr * rr,
+        "HeartStress": hr / bmi, "SmokingBMI": sc * bmi, "Pulse_HR": max(pp * hr, 0.0),
+        "BP_Smoking": ratio * sc, "Smoking_encoded": sc,
+        "BMI_Category_Overweight": 1.0 if bmi >= 25 else 0.0,
+    }
+    total = k["intercept"]
+    for col, c in zip(k["features"], k["coef"]):
+        total = total + c * x[col]
+    # Same rounding as np.round(total, 2)
+    score = round(total * 100) / 100
+    risk = "Low" if score <= k["low_max"] else "Medium" if score <= k["medium_max"] else "High"
+    return score, risk
@@ -0,0 +1,340 @@
+# scripts/session_log.py
+import argparse
+import csv
+import io
+import operator
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialised within one process
+    fcntl = None
+
+COLUMNS = ["PatientID", "Timestamp", "Score", "Risk", "Source"]
+
+CSV_PATH = os.path.join("data", "session_scores.csv")
+DB_PATH = os.path.join("data", "session_scores.db")
+
+# Comparison operators accepted by count() / page() filters
+FILTER_OPS = {
+    "=": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge, "contains": None, "datestartswith": None,
+}
+
+_INSERT = "INSERT INTO scores (PatientID, Timestamp, Score, Risk, Source) VALUES (?, ?, ?, ?, ?)"
+# Upper bound on rows returned by one changes() call
+CHANGES_LIMIT = 10_000
+
+
+def _clean(row):
+    # Normalise one score record to the column order / types used by every backend
+    return (
+        str(row["PatientID"]),
+        str(row["Timestamp"]),
+        float(row["Score"]),
+        str(row["Risk"]),
+        None if row.get("Source") is None or pd.isna(row.get("Source")) else str(row["Source"]),
+    )
+
+
+class SQLiteSessionLog:
+    """Append-only session log stored in SQLite (WAL mode)."""
+
+    backend = "sqlite"
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        con = self._con()
+        con.executescript("""
+            CREATE TABLE IF NOT EXISTS scores (
+                id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                PatientID TEXT NOT NULL,
+                Timestamp TEXT NOT NULL,
+                Score     REAL NOT NULL,
+                Risk      TEXT NOT NULL,
+                Source    TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_scores_patient ON scores (PatientID, Timestamp);
+            CREATE INDEX IF NOT EXISTS idx_scores_timestamp ON scores (Timestamp);
+            CREATE INDEX IF NOT EXISTS idx_scores_source ON scores (Source, Timestamp);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    # One connection per thread: Dash serves callbacks from a thread pool
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _frame(self, sql, params=()):
+        cur = self._con().execute(sql, params)
+        return pd.DataFrame(cur.fetchall(), columns=COLUMNS)
+
+    # --- Writes ---
+    def append(self, row):
+        cur = self._con().execute(_INSERT, _clean(row))
+        return cur.lastrowid
+
+    def append_many(self, rows):
+        con = self._con()
+        con.execute("BEGIN")
+        try:
+            con.executemany(_INSERT, [_clean(r) for r in rows])
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    # --- Reads ---
+    def read_all(self):
+        return self._frame(f"SELECT {', '.join(COLUMNS)} FROM scores ORDER BY id")
+
+    # `upto` (a cursor() value) limits reads to rows appended up to that point
+    def history(self, pid, upto=None):
+        where, params = self._upto("PatientID = ?", [str(pid)], upto)
+        return self._frame(f"SELECT {', '.join(COLUMNS)} FROM scores WHERE {where} ORDER BY Timestamp, id", params)
+
+    def since(self, timestamp, source=None, upto=None):
+        where, params = ("Timestamp >= ?", [timestamp]) if source is None else ("Source = ? AND Timestamp >= ?", [source, timestamp])
+        where, params = self._upto(where, params, upto)
+        return self._frame(f"SELECT {', '.join(COLUMNS)} FROM scores WHERE {where} ORDER BY Timestamp, id", params)
+
+    @staticmethod
+    def _upto(where, params, upto):
+        return (where, params) if upto is None else (f"{where} AND id <= ?", params + [upto])
+
+    # --- Change feed: rows appended by any process, in commit order ---
+    def cursor(self):
+        return self._con().execute("SELECT COALESCE(MAX(id), 0) FROM scores").fetchone()[0]
+
+    def changes(self, after, limit=CHANGES_LIMIT):
+        cur = self._con().execute(
+            f"SELECT id, {', '.join(COLUMNS)} FROM scores WHERE id > ? ORDER BY id LIMIT ?", (after, limit)
+        )
+        return [dict(zip(["id"] + COLUMNS, r)) for r in cur.fetchall()]
+
+    def _where(self, source=None, since=None, filters=()):
+        clauses, params = [], []
+        if source is not None:
+            clauses.append("Source = ?")
+            params.append(source)
+        if since is not None:
+            clauses.append("Timestamp >= ?")
+            params.append(since)
+        for col, op, value in filters:
+            if col not in COLUMNS or op not in FILTER_OPS:
+                raise ValueError(f"Unsupported filter: {col} {op}")
+            if op == "contains":
+                clauses.append(f"{col} LIKE ?")
+                params.append(f"%{value}%")
+            elif op == "datestartswith":
+                clauses.append(f"{col} LIKE ?")
+                params.append(f"{value}%")
+            else:
+                clauses.append(f"{col} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, source=None, since=None, filters=()):
+        where, params = self._where(source, since, filters)
+        return self._con().execute(f"SELECT COUNT(*) FROM scores{where}", params).fetchone()[0]
+
+    def page(self, source=None, since=None, filters=(), sort=(), offset=0, limit=25):
+        # One page of rows; only `limit` rows are materialised
+        where, params = self._where(source, since, filters)
+        order = []
+        for col, direction in sort:
+            if col not in COLUMNS or direction not in ("asc", "desc"):
+                raise ValueError(f"Unsupported sort: {col} {direction}")
+            order.append(f"{col} {direction.upper()}")
+        order_by = ", ".join(order + ["Timestamp", "id"])
+        return self._frame(
+            f"SELECT {', '.join(COLUMNS)} FROM scores{where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            params + [int(limit), int(offset)],
+        )
+
+    def risk_counts(self, start, end, upto=None):
+        # (Source, Risk, n) for start <= Timestamp < end
+        where, params = self._upto("Timestamp >= ? AND Timestamp < ?", [start, end], upto)
+        return self._con().execute(
+            f"SELECT Source, Risk, COUNT(*) FROM scores WHERE {where} GROUP BY Source, Risk", params
+        ).fetchall()
+
+    # --- Migration / export ---
+    def migrate_csv(self, csv_path=CSV_PATH):
+        con = self._con()
+        done = "SELECT value FROM meta WHERE key = 'migrated_from'"
+        if not os.path.exists(csv_path) or con.execute(done).fetchone() is not None:
+            return 0
+        # IMMEDIATE takes the write lock up front: workers starting together migrate exactly once
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if con.execute(done).fetchone() is not None:
+                con.execute("ROLLBACK")
+                return 0
+            rows = pd.read_csv(csv_path, dtype={"PatientID": str}).to_dict("records")
+            con.executemany(_INSERT, [_clean(r) for r in rows])
+            con.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)", (csv_path,))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def export_csv(self, path=CSV_PATH):
+        self.read_all().to_csv(path, index=False)
+
+
+def _flock(f, exclusive):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+class CSVSessionLog:
+    """Session log kept as a plain CSV file; appends rows without rewriting the file.
+
+    Appends hold an exclusive flock and go out in one write, so several processes can share
+    the file; readers take a shared lock and never see half a batch. The change-feed cursor
+    is the file size in bytes.
+    """
+
+    backend = "csv"
+
+    def __init__(self, path=CSV_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", newline="") as f:
+            _flock(f, exclusive=True)
+            if f.tell() == 0:
+                csv.writer(f).writerow(COLUMNS)
+
+    def append(self, row):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        buf = io.StringIO(newline="")
+        csv.writer(buf).writerows(_clean(r) for r in rows)
+        with self._lock, open(self.path, "a", newline="") as f:
+            _flock(f, exclusive=True)
+            f.write(buf.getvalue())
+
+    def _read_bytes(self, start=0, upto=None):
+        with open(self.path, "rb") as f:
+            _flock(f, exclusive=False)
+            f.seek(start)
+            return f.read() if upto is None else f.read(max(upto - start, 0))
+
+    def read_all(self, upto=None):
+        return pd.read_csv(io.BytesIO(self._read_bytes(upto=upto)), dtype={"PatientID": str})
+
+    def cursor(self):
+        # Size of the file under the shared lock, so a concurrent append is either fully counted or not at all
+        with open(self.path, "rb") as f:
+            _flock(f, exclusive=False)
+            return os.fstat(f.fileno()).st_size
+
+    def changes(self, after, limit=CHANGES_LIMIT):
+        # Complete lines after byte offset `after`; each row's id is the offset just past its line
+        data = self._read_bytes(start=after)
+        rows, pos = [], after
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n") or len(rows) >= limit:
+                break
+            pos += len(line)
+            values = next(csv.reader([line.decode()]))
+            row = dict(zip(COLUMNS, values))
+            row.update(id=pos, Score=float(row["Score"]), Source=row["Source"] or None)
+            rows.append(row)
+        return rows
+
+    def history(self, pid, upto=None):
+        df = self.read_all(upto)
+        return df[df.PatientID == str(pid)].sort_values("Timestamp", kind="stable")
+
+    def since(self, timestamp, source=None, upto=None):
+        df = self.read_all(upto)
+        if source is not None:
+            df = df[df.Source == source]
+        return df[df.Timestamp >= timestamp].sort_values("Timestamp", kind="stable")
+
+    def _select(self, source=None, since=None, filters=()):
+        df = self.read_all()
+        if source is not None:
+            df = df[df.Source == source]
+        if since is not None:
+            df = df[df.Timestamp >= since]
+        for col, op, value in filters:
+            if col not in COLUMNS or op not in FILTER_OPS:
+                raise ValueError(f"Unsupported filter: {col} {op}")
+            series = df[col]
+            if op == "contains":
+                df = df[series.astype(str).str.contains(str(value), regex=False)]
+            elif op == "datestartswith":
+                df = df[series.astype(str).str.startswith(str(value))]
+            else:
+                df = df[FILTER_OPS[op](series, value)]
+        return df
+
+    def count(self, source=None, since=None, filters=()):
+        return len(self._select(source, since, filters))
+
+    def page(self, source=None, since=None, filters=(), sort=(), offset=0, limit=25):
+        df = self._select(source, since, filters).sort_values("Timestamp", kind="stable")
+        for col, direction in reversed(list(sort)):
+            df = df.sort_values(col, ascending=direction == "asc", kind="stable")
+        return df.iloc[offset:offset + limit]
+
+    def risk_counts(self, start, end, upto=None):
+        df = self.read_all(upto)
+        df = df[(df.Timestamp >= start) & (df.Timestamp < end)]
+        counts = df.groupby(["Source", "Risk"], dropna=False).size()
+        return [(None if pd.isna(src) else src, risk, int(n)) for (src, risk), n in counts.items()]
+
+    def export_csv(self, path=CSV_PATH):
+        if os.path.abspath(path) != os.path.abspath(self.path):
+            self.read_all().to_csv(path, index=False)
+
+
+def open_session_log(backend=None):
+    # SESSION_LOG_BACKEND=csv keeps the legacy single-file log
+    backend = backend or os.environ.get("SESSION_LOG_BACKEND", "sqlite")
+    if backend == "csv":
+        return CSVSessionLog(os.environ.get("SESSION_LOG_PATH", CSV_PATH))
+    if backend != "sqlite":
+        raise ValueError(f"Unknown session log backend: {backend!r}")
+    log = SQLiteSessionLog(os.environ.get("SESSION_LOG_PATH", DB_PATH))
+    # One-shot import of the legacy CSV the first time the database is opened (SESSION_LOG_MIGRATE= skips it)
+    migrate = os.environ.get("SESSION_LOG_MIGRATE", CSV_PATH)
+    if migrate:
+        log.migrate_csv(migrate)
+    return log
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the session score log.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    m = sub.add_parser("migrate", help="Import the legacy CSV log into SQLite")
+    m.add_argument("--csv", default=CSV_PATH)
+    m.add_argument("--db", default=DB_PATH)
+    e = sub.add_parser("export", help="Export the SQLite log to CSV")
+    e.add_argument("--db", default=DB_PATH)
+    e.add_argument("--out", default=CSV_PATH)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        n = SQLiteSessionLog(args.db).migrate_csv(args.csv)
+        print(f"✅ Migrated {n} rows from {args.csv} into {args.db}")
+    else:
+        SQLiteSessionLog(args.db).export_csv(args.out)
+        print(f"📁 Session log exported to {args.out}")
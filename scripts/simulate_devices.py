@@ -0,0 +1,91 @@
+# scripts/simulate_devices.py
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+def device_profile(rng):
+    # Per-device baseline; each reading adds a little noise around it
+    return {
+        "Body Height": rng.uniform(150, 195),
+        "Body Weight": rng.uniform(50, 120),
+        "Diastolic Blood Pressure": rng.uniform(60, 95),
+        "Systolic Blood Pressure": rng.uniform(100, 160),
+        "Heart rate": rng.uniform(55, 100),
+        "Respiratory rate": rng.uniform(12, 20),
+        "Tobacco smoking status": rng.choice(["NO", "NO", "EX", "YES"]),
+    }
+
+
+def reading(device_id, profile, rng):
+    record = {"PatientID": f"DEV{device_id:05d}", "Source": "Remote"}
+    for col, value in profile.items():
+        record[col] = value if isinstance(value, str) else round(value * rng.uniform(0.97, 1.03), 1)
+    return record
+
+
+async def run_device(device_id, args, counters, stop_at):
+    rng = random.Random(args.seed * 1_000_003 + device_id)
+    profile = device_profile(rng)
+    # Spread connections and first readings so devices do not fire in lockstep
+    await asyncio.sleep(rng.uniform(0, args.ramp))
+    try:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    except OSError:
+        counters["failed"] += 1
+        return
+    counters["connected"] += 1
+    try:
+        while time.monotonic() < stop_at:
+            line = json.dumps(reading(device_id, profile, rng)).encode()
+            if args.http:
+                writer.write(f"POST /ingest HTTP/1.1\r\nHost: {args.host}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(line)}\r\n\r\n".encode() + line)
+                await writer.drain()
+                status = await reader.readline()
+                length = 0
+                while (header := await reader.readline()) not in (b"\r\n", b""):
+                    if header.lower().startswith(b"content-length:"):
+                        length = int(header.split(b":")[1])
+                await reader.readexactly(length)
+                if b" 202 " not in status:
+                    counters["errors"] += 1
+            else:
+                writer.write(line + b"\n")
+                await writer.drain()
+            counters["sent"] += 1
+            await asyncio.sleep(min(rng.expovariate(1 / args.interval), max(stop_at - time.monotonic(), 0)))
+    except (ConnectionError, asyncio.IncompleteReadError):
+        counters["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def main(args):
+    counters = {"connected": 0, "failed": 0, "sent": 0, "errors": 0}
+    start = time.monotonic()
+    stop_at = start + args.duration
+    tasks = [asyncio.create_task(run_device(i, args, counters, stop_at)) for i in range(args.devices)]
+    while not all(t.done() for t in tasks):
+        await asyncio.sleep(args.report)
+        elapsed = time.monotonic() - start
+        print(f"🛰️  {elapsed:5.1f}s: {counters['connected']} connected, {counters['failed']} failed, "
+              f"{counters['sent']} readings ({counters['sent'] / elapsed:.0f}/s), {counters['errors']} errors", flush=True)
+    await asyncio.gather(*tasks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated fleet of home monitoring devices streaming vitals to ingest.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=1.0, help="Mean seconds between readings per device")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep streaming")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds over which devices connect")
+    parser.add_argument("--http", action="store_true", help="POST each reading instead of streaming NDJSON")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args))
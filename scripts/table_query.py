@@ -0,0 +1,42 @@
+# scripts/table_query.py
+# Translate DataTable custom filter / sort props into session-log queries
+
+# (operator spellings Dash may emit, normalised operator); order matters: '>=' before '='
+OPERATORS = [
+    (("ge ", ">="), ">="), (("le ", "<="), "<="), (("lt ", "<"), "<"), (("gt ", ">"), ">"),
+    (("ne ", "!="), "!="), (("eq ", "s=", "="), "="),
+    (("contains ",), "contains"), (("datestartswith ",), "datestartswith"),
+]
+
+
+def _split_filter_part(part, numeric_columns):
+    for spellings, op in OPERATORS:
+        for spelling in spellings:
+            if spelling not in part:
+                continue
+            name_part, value_part = part.split(spelling, 1)
+            name = name_part[name_part.find("{") + 1:name_part.rfind("}")]
+            value = value_part.strip()
+            if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"`":
+                value = value[1:-1].replace("\\" + value[0], value[0])
+            elif name in numeric_columns:
+                try:
+                    value = float(value)
+                except ValueError:
+                    return None
+            return name, op, value
+    return None
+
+
+def parse_filter_query(filter_query, numeric_columns=("Score",)):
+    # '{Risk} s= High && {Score} > 3' -> [("Risk", "=", "High"), ("Score", ">", 3.0)]
+    filters = []
+    for part in (filter_query or "").split(" && "):
+        parsed = _split_filter_part(part, numeric_columns) if part.strip() else None
+        if parsed is not None:
+            filters.append(parsed)
+    return filters
+
+
+def parse_sort_by(sort_by):
+    return [(s["column_id"], s["direction"]) for s in (sort_by or [])]
@@ -0,0 +1,43 @@
+# tests/test_alerts.py
+import time
+from datetime import datetime, timedelta
+
+from alerts import DEFAULT_RULES, TIMESTAMP_FORMAT, AlertEngine, AlertTicker, RecentAlerts, build_rules
+from log_follower import LogFollower
+from session_log import SQLiteSessionLog
+
+
+def test_horizon_is_the_longest_rule_window():
+    assert AlertEngine(build_rules(DEFAULT_RULES)).horizon() == 12 * 3600
+    assert AlertEngine(build_rules([{"type": "trend", "name": "t", "metric": "score", "above": 4}])).horizon() == 0
+
+
+def test_warm_up_over_the_horizon_keeps_silence_state(tmp_path):
+    # A Remote patient last seen 10 h ago is outside a 7 h window but must still be watched for silence
+    now = datetime(2026, 1, 1, 12)
+    log = SQLiteSessionLog(str(tmp_path / "scores.db"))
+    log.append({"PatientID": "p1", "Timestamp": (now - timedelta(hours=10)).strftime(TIMESTAMP_FORMAT),
+                "Score": 1.0, "Risk": "Low", "Source": "Remote"})
+    alerts = RecentAlerts()
+    engine = AlertEngine(build_rules(DEFAULT_RULES), [alerts])
+    since = (now - timedelta(seconds=engine.horizon())).strftime(TIMESTAMP_FORMAT)
+    engine.load(log.since(since, upto=log.cursor()).to_dict("records"))
+    assert engine.readings == 1 and alerts.total == 0
+    engine.tick(now + timedelta(hours=3))
+    assert [a["Rule"] for a in alerts.latest()] == ["remote_silent_12h"]
+
+
+def test_ticker_raises_alerts_without_a_page_refresh(tmp_path):
+    log = SQLiteSessionLog(str(tmp_path / "scores.db"))
+    alerts = RecentAlerts()
+    engine = AlertEngine(build_rules(DEFAULT_RULES), [alerts])
+    ticker = AlertTicker(LogFollower(log, [engine], log.cursor()), engine, interval=0.01)
+    try:
+        log.append({"PatientID": "p1", "Timestamp": (datetime.now() - timedelta(hours=13)).strftime(TIMESTAMP_FORMAT),
+                    "Score": 1.0, "Risk": "Low", "Source": "Remote"})
+        deadline = time.monotonic() + 5
+        while not alerts.total and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        ticker.stop()
+    assert [a["Rule"] for a in alerts.latest()] == ["remote_silent_12h"]
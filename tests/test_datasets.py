@@ -0,0 +1,41 @@
+# tests/test_datasets.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def processed(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(datasets, "PROCESSED_CSV", str(tmp_path / "processed_data.csv"))
+    monkeypatch.setattr(datasets, "PROCESSED_PARQUET", str(tmp_path / "processed_data.parquet"))
+    return pd.DataFrame({"BMI": [0.5, -1.25], "Smoking_encoded": [0.0, 2.0], "BMI_Category_Obese": [True, False],
+                         "Count": [3, 4], "Pain severity": [7.0, 0.0]})
+
+
+def test_fresher_csv_wins_over_stale_parquet(processed):
+    datasets.write_parquet(processed.assign(BMI=[9.0, 9.0]), datasets.PROCESSED_PARQUET)
+    processed.to_csv(datasets.PROCESSED_CSV, index=False)
+    stale = os.path.getmtime(datasets.PROCESSED_PARQUET) - 60
+    os.utime(datasets.PROCESSED_PARQUET, (stale, stale))
+    assert list(datasets.read_processed()["BMI"]) == [0.5, -1.25]
+    assert list(next(datasets.iter_processed(10))["BMI"]) == [0.5, -1.25]
+
+
+def test_parquet_used_when_current(processed):
+    processed.to_csv(datasets.PROCESSED_CSV, index=False)
+    datasets.write_parquet(processed, datasets.PROCESSED_PARQUET)
+    assert datasets.read_processed()["BMI"].dtype == np.float32
+
+
+def test_compact_dtypes_keeps_integers():
+    df = datasets.compact_dtypes(pd.DataFrame({"BMI": [0.5], "Count": [3], "Pain severity": [7.0],
+                                               "Smoking_encoded": [2.0], "BMI_Category_Obese": [1]}))
+    assert df.dtypes.to_dict() == {"BMI": np.float32, "Count": np.int64, "Pain severity": np.int8,
+                                   "Smoking_encoded": np.int8, "BMI_Category_Obese": bool}
@@ -0,0 +1,68 @@
+# tests/test_ingest.py
+import asyncio
+import json
+
+from ingest import ConnectionStats, IngestService
+from scoring import compile_kernel
+
+RECORD = {"PatientID": "P001", "Body Height": 172, "Body Weight": 81, "Diastolic Blood Pressure": 82,
+          "Systolic Blood Pressure": 131, "Heart rate": 77, "Respiratory rate": 16, "Tobacco smoking status": "NO"}
+
+
+class FlakyLog:
+    """append_many that fails `failures` times before succeeding."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.rows = []
+
+    def append_many(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        self.rows.extend(rows)
+
+
+def run(service, lines):
+    async def main():
+        stats = ConnectionStats("test")
+        for line in lines:
+            await service.feed(line.encode(), stats)
+        writer = asyncio.create_task(service.writer())
+        await service.queue.join()
+        writer.cancel()
+        return stats
+    return asyncio.run(main())
+
+
+def service(log, tmp_path, **options):
+    return IngestService(log, compile_kernel(), batch_wait_ms=0, retry_delay=0,
+                         dead_letter_path=str(tmp_path / "dead.ndjson"), **options)
+
+
+def test_malformed_lines_are_rejected(tmp_path):
+    log = FlakyLog(0)
+    lines = [json.dumps(dict(RECORD, **{"Tobacco smoking status": ["NO"]})),
+             json.dumps(dict(RECORD, **{"Heart rate": 10 ** 400})),
+             "{not json", json.dumps(RECORD)]
+    stats = run(service(log, tmp_path), lines)
+    assert (stats.rejected, stats.records) == (3, 1)
+    assert [r["PatientID"] for r in log.rows] == ["P001"]
+
+
+def test_failed_write_is_retried(tmp_path):
+    log = FlakyLog(2)
+    svc = service(log, tmp_path, write_retries=3)
+    run(svc, [json.dumps(RECORD)])
+    assert len(log.rows) == 1 and svc.dead_lettered == 0
+
+
+def test_batch_that_keeps_failing_is_dead_lettered(tmp_path):
+    log = FlakyLog(100)
+    svc = service(log, tmp_path, write_retries=2)
+    run(svc, [json.dumps(RECORD), json.dumps(dict(RECORD, PatientID="P002"))])
+    assert svc.dead_lettered == 2 and not log.rows
+    with open(tmp_path / "dead.ndjson") as f:
+        dead = [json.loads(line) for line in f]
+    assert [d["record"]["PatientID"] for d in dead] == ["P001", "P002"]
+    assert dead[0]["error"] == "RuntimeError: database is locked"
@@ -0,0 +1,33 @@
+# tests/test_metrics.py
+import pytest
+from flask import Flask
+
+import metrics
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(metrics, "PROFILER_ENABLED", True)
+    server = Flask(__name__)
+    metrics.instrument_server(server, {})
+    return server.test_client()
+
+
+@pytest.mark.parametrize("query", [
+    "seconds=abc", "interval_ms=fast", "seconds=0", "seconds=-1", "seconds=nan", "seconds=inf", "interval_ms=-5",
+])
+def test_profile_rejects_bad_parameters(client, query):
+    assert client.get(f"/metrics/profile?{query}").status_code == 400
+
+
+def test_profile_clamps_the_interval(client):
+    response = client.get("/metrics/profile?seconds=0.05&interval_ms=0")
+    assert response.status_code == 200
+    assert 0 < int(response.headers["X-Profile-Samples"]) <= 51
+
+
+def test_profile_caps_the_duration(client, monkeypatch):
+    captured = []
+    monkeypatch.setattr(metrics.SamplingProfiler, "run", lambda self, seconds: captured.append(seconds) or self)
+    assert client.get("/metrics/profile?seconds=3600").status_code == 200
+    assert captured == [metrics.MAX_PROFILE_SECONDS]
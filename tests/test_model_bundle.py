@@ -0,0 +1,41 @@
+# tests/test_model_bundle.py
+import os
+
+import joblib
+import pytest
+
+import model_bundle
+import scoring
+
+
+@pytest.fixture
+def kernel_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "compiled_scorer.pkl")
+    monkeypatch.setattr(scoring, "KERNEL_PATH", path)
+    monkeypatch.setattr(scoring, "_kernel", None)
+    return path
+
+
+def test_manifest_records_the_kernel_it_bundles(tmp_path, kernel_path):
+    weights = [("BMI", 0.5), ("Smoking_encoded", 0.25)]
+    joblib.dump(scoring.compile_kernel(weights=weights, low_max=1.5, medium_max=3.5), kernel_path)
+    manifest = model_bundle.build_bundle(str(tmp_path / "bundle"), "test")
+    assert manifest["scoring"]["weights"] == [list(w) for w in weights]
+    assert (manifest["scoring"]["low_max"], manifest["scoring"]["medium_max"]) == (1.5, 3.5)
+    assert manifest["sources"] == {scoring.SCALER_PATH: model_bundle._sha256(scoring.SCALER_PATH),
+                                   kernel_path: model_bundle._sha256(kernel_path)}
+
+
+def test_recompiled_pickle_overrides_the_bundle(tmp_path, kernel_path, monkeypatch, capsys):
+    joblib.dump(scoring.compile_kernel(), kernel_path)
+    model_bundle.build_bundle(str(tmp_path / "bundle"), "test")
+    bundle = model_bundle.load_bundle(str(tmp_path / "bundle"))
+    monkeypatch.setattr(model_bundle, "_bundle", bundle)
+    assert scoring.load_kernel() is bundle.kernel
+
+    joblib.dump(scoring.compile_kernel(low_max=1.0), kernel_path)
+    built = os.path.getmtime(os.path.join(bundle.path, model_bundle.MANIFEST))
+    os.utime(kernel_path, (built + 10, built + 10))
+    monkeypatch.setattr(scoring, "_kernel", None)
+    assert scoring.load_kernel()["low_max"] == 1.0
+    assert "changed after model bundle test" in capsys.readouterr().out
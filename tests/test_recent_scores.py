@@ -0,0 +1,19 @@
+# tests/test_recent_scores.py
+from datetime import datetime, timedelta
+
+from recent_scores import MINUTE_FORMAT, RecentScores
+
+
+def test_add_keeps_memory_bounded_without_reads():
+    recent = RecentScores(horizon=timedelta(hours=2))
+    start = datetime(2026, 1, 1)
+    for i in range(24 * 60):  # one row a minute for a day, never rendered
+        now = start + timedelta(minutes=i)
+        recent.add({"id": i, "PatientID": "P1", "Timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+                    "Score": 1.0, "Risk": "Low", "Source": "Remote"}, now=now)
+    # At most the horizon plus the not-yet-compacted expired prefix (compaction at half)
+    assert len(recent._ts["Remote"]) <= 2 * 2 * 60 + 2
+    assert len(recent._arrivals["Remote"]) <= 2 * 2 * 60 + 2
+    rows = recent.window("Remote", hours=2, now=now)
+    assert rows[0]["Timestamp"] >= (now - timedelta(hours=2)).strftime(MINUTE_FORMAT)
+    assert len(rows) == 2 * 60 + 1
@@ -0,0 +1,85 @@
+# tests/test_score_api.py
+import threading
+
+import pytest
+from flask import Flask
+
+from score_api import MicroBatcher, register_score_api
+from scoring import compile_kernel
+
+RECORD = {"PatientID": "P001", "Source": "Remote", "Body Height": 172, "Body Weight": 81,
+          "Diastolic Blood Pressure": 82, "Systolic Blood Pressure": 131, "Heart rate": 77,
+          "Respiratory rate": 16, "Tobacco smoking status": "NO"}
+
+
+class BlockingLog:
+    """log_many that holds every batch until released, recording what was written."""
+
+    def __init__(self):
+        self.rows = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, rows):
+        self.started.set()
+        self.release.wait(5)
+        self.rows.extend(rows)
+
+
+@pytest.fixture
+def api():
+    log = BlockingLog()
+    server = Flask(__name__)
+    register_score_api(server, MicroBatcher(compile_kernel(), log, max_wait_ms=0), timeout=0.2)
+    yield server.test_client(), log
+    log.release.set()
+
+
+def post(client, patient, out):
+    out[patient] = client.post("/api/score", json=dict(RECORD, PatientID=patient))
+
+
+def test_timed_out_request_is_not_logged(api):
+    client, log = api
+    responses = {}
+    first = threading.Thread(target=post, args=(client, "P1", responses))
+    first.start()
+    assert log.started.wait(5)
+    # P2 queues behind P1's blocked write, times out and is cancelled before its batch starts
+    post(client, "P2", responses)
+    assert responses["P2"].status_code == 503
+    log.release.set()
+    first.join()
+    assert responses["P1"].status_code == 200
+    assert [r["PatientID"] for r in log.rows] == ["P1"]
+
+
+def test_in_flight_request_is_accepted(api):
+    client, log = api
+    responses = {}
+    post(client, "P1", responses)
+    assert responses["P1"].status_code == 202
+    log.release.set()
+    client.post("/api/score", json=RECORD)
+    assert [r["PatientID"] for r in log.rows] == ["P1", "P001"]
+
+
+def test_response_carries_the_logged_row(api):
+    client, log = api
+    log.release.set()
+    response = client.post("/api/score", json=[RECORD])
+    assert response.status_code == 200
+    assert response.get_json() == log.rows
+
+
+@pytest.mark.parametrize("field, value", [
+    ("Tobacco smoking status", ["NO"]), ("Tobacco smoking status", {"status": "NO"}), ("Source", ["Remote"]),
+    ("Heart rate", 10 ** 400), ("Heart rate", "77"), ("Heart rate", True),
+])
+def test_malformed_values_are_rejected(api, field, value):
+    client, log = api
+    log.release.set()
+    response = client.post("/api/score", json=dict(RECORD, **{field: value}))
+    assert response.status_code == 400
+    assert field in response.get_json()["error"]
+    assert not log.rows
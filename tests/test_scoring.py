@@ -0,0 +1,65 @@
+# tests/test_scoring.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from compile_scorer import random_vitals
+from scoring import (
+    LOW_MAX, MEDIUM_MAX, RAW_COLS, SMOKING_CODES, classify, compile_kernel, kernel_scores, load_kernel,
+    reference_scores, score_batch, score_one,
+)
+
+SMOKING = ["NO", "EX", "YES"]
+
+
+@pytest.fixture(scope="module")
+def vitals():
+    rng = np.random.default_rng(11)
+    n = 2_000
+    df = pd.DataFrame({
+        "Body Height": rng.uniform(120, 210, n), "Body Weight": rng.uniform(30, 180, n),
+        "Diastolic Blood Pressure": rng.uniform(40, 120, n), "Systolic Blood Pressure": rng.uniform(80, 220, n),
+        "Heart rate": rng.uniform(40, 160, n), "Respiratory rate": rng.uniform(8, 35, n),
+    })
+    df["Tobacco smoking status"] = rng.choice(SMOKING, n)
+    return df
+
+
+def test_kernel_matches_reference_path():
+    feats = random_vitals(20_000, seed=3)
+    assert np.max(np.abs(kernel_scores(feats, compile_kernel()) - reference_scores(feats))) < 1e-9
+
+
+def test_score_one_matches_score_batch(vitals):
+    kernel = load_kernel()
+    scores, risks = score_batch(vitals, kernel)
+    for i, row in enumerate(vitals.itertuples(index=False)):
+        score, risk = score_one(*row, kernel=kernel)
+        assert (score, risk) == (scores[i], risks[i])
+
+
+def test_score_batch_accepts_encoded_smoking(vitals):
+    encoded = vitals.drop(columns="Tobacco smoking status")
+    encoded["Smoking_encoded"] = vitals["Tobacco smoking status"].map(SMOKING_CODES)
+    np.testing.assert_array_equal(score_batch(encoded)[0], score_batch(vitals)[0])
+
+
+def test_missing_vitals_are_not_scored(vitals):
+    df = vitals.head(3).copy()
+    df.loc[1, RAW_COLS[0]] = np.nan
+    scores, risks = score_batch(df)
+    assert np.isnan(scores[1]) and risks[1] is None
+    assert not np.isnan(scores[[0, 2]]).any()
+
+
+@pytest.mark.parametrize("score, risk", [
+    (LOW_MAX - 0.01, "Low"), (LOW_MAX, "Low"), (LOW_MAX + 0.01, "Medium"),
+    (MEDIUM_MAX, "Medium"), (MEDIUM_MAX + 0.01, "High"),
+])
+def test_band_edges(vitals, score, risk):
+    # A constant kernel puts every record exactly on `score`, through all three paths
+    kernel = {"features": [], "coef": [], "intercept": score, "low_max": LOW_MAX, "medium_max": MEDIUM_MAX}
+    assert classify([score], kernel)[0] == risk
+    assert score_one(*vitals.iloc[0], kernel=kernel) == (score, risk)
+    scores, risks = score_batch(vitals.head(5), kernel)
+    assert list(scores) == [score] * 5 and list(risks) == [risk] * 5
@@ -0,0 +1,36 @@
+# tests/test_session_log.py
+import pandas as pd
+import pytest
+
+from session_log import COLUMNS, open_session_log
+
+ROW = {"PatientID": "P1", "Timestamp": "2026-01-01 10:00:00", "Score": 1.5, "Risk": "Low", "Source": "Remote"}
+
+
+@pytest.fixture
+def legacy_csv(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.csv"
+    pd.DataFrame([ROW], columns=COLUMNS).to_csv(path, index=False)
+    monkeypatch.setenv("SESSION_LOG_BACKEND", "sqlite")
+    monkeypatch.setenv("SESSION_LOG_PATH", str(tmp_path / "scores.db"))
+    return str(path)
+
+
+def test_legacy_csv_is_imported_once(legacy_csv, monkeypatch):
+    monkeypatch.setenv("SESSION_LOG_MIGRATE", legacy_csv)
+    assert open_session_log().count() == 1
+    assert open_session_log().count() == 1
+
+
+def test_migration_can_be_turned_off(legacy_csv, monkeypatch):
+    monkeypatch.setenv("SESSION_LOG_MIGRATE", "")
+    assert open_session_log().count() == 0
+
+
+def test_csv_cursor_is_the_file_size(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSION_LOG_BACKEND", "csv")
+    monkeypatch.setenv("SESSION_LOG_PATH", str(tmp_path / "scores.csv"))
+    log = open_session_log()
+    log.append_many([ROW, ROW])
+    assert log.cursor() == (tmp_path / "scores.csv").stat().st_size
+    assert log.changes(log.cursor()) == []
@@ -0,0 +1,72 @@
+# tests/test_sketches.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import calibrate
+import datasets
+from compile_scorer import random_vitals
+from scoring import RAW_COLS, score_batch
+from sketches import KLLSketch
+
+
+# Normalised rank error a k-sized sketch stays within (KLL's ~1.7/k, with room for the random compactions)
+def rank_bound(k):
+    return 3.3 / k
+
+
+def rank_errors(sketch, values, qs):
+    values = np.sort(values)
+    return [abs(np.searchsorted(values, sketch.quantile(q), side="right") / len(values) - q) for q in qs]
+
+
+@pytest.fixture
+def vitals_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "DATA_DIR", str(tmp_path))
+    feats = random_vitals(60_000, seed=7)
+    df = pd.DataFrame({c: feats[c] for c in RAW_COLS})
+    df["Tobacco smoking status"] = np.random.default_rng(7).choice(["NO", "EX", "YES"], len(df))
+    df["Source"] = np.where(np.arange(len(df)) % 3, "InPerson", "Remote")
+    df.to_csv(tmp_path / "vitals.csv", index=False)
+    return "vitals.csv", df
+
+
+def test_chunked_file_matches_numpy_quantiles(vitals_file):
+    name, df = vitals_file
+    k = 200
+    sketches = calibrate.sketch_file(name, chunksize=7_000, k=k)
+    scores, _ = score_batch(df)
+    qs = np.linspace(0.01, 0.99, 99)
+    assert sketches["all|all"].n == len(scores)
+    assert max(rank_errors(sketches["all|all"], scores, qs)) <= rank_bound(k)
+    for source in ("InPerson", "Remote"):
+        part = scores[df["Source"].to_numpy() == source]
+        assert max(rank_errors(sketches[f"{source}|all"], part, qs)) <= rank_bound(k)
+    for q in (0.1, 0.5, 0.9):
+        est = sketches["all|all"].quantile(q)
+        assert np.quantile(scores, q - rank_bound(k)) <= est <= np.quantile(scores, q + rank_bound(k))
+
+
+def test_seed_makes_sketches_reproducible(vitals_file):
+    name, _ = vitals_file
+    first = calibrate.sketch_file(name, chunksize=7_000, k=50, seed=3)
+    second = calibrate.sketch_file(name, chunksize=7_000, k=50, seed=3)
+    assert {k: s.to_dict() for k, s in first.items()} == {k: s.to_dict() for k, s in second.items()}
+
+
+def test_large_batch_keeps_lower_levels():
+    sketch = KLLSketch(200, seed=0).update(np.random.default_rng(0).normal(size=500_000))
+    assert sketch.n == 500_000
+    assert sum(len(level) * 2 ** h for h, level in enumerate(sketch.levels)) == sketch.n
+    assert all(len(level) for level in sketch.levels[:-1])
+    assert all(len(level) <= sketch._capacity(h) for h, level in enumerate(sketch.levels))
+
+
+def test_merge_matches_single_stream():
+    rng = np.random.default_rng(1)
+    data = rng.gamma(2.0, 0.3, 200_000)
+    merged = KLLSketch(200, seed=0)
+    for part in np.array_split(data, 9):
+        merged.merge(KLLSketch(200, seed=1).update(part))
+    assert merged.n == len(data)
+    assert max(rank_errors(merged, data, np.linspace(0.01, 0.99, 99))) <= rank_bound(200)
@@ -0,0 +1,68 @@
+# tests/test_tree_model.py
+import numpy as np
+import pytest
+
+from tree_model import export_trees, load_trees, predict, predict_proba
+
+xgb = pytest.importorskip("xgboost")
+
+
+def training_data(n_classes, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(3_000, 6)).astype(np.float32)
+    # Skewed labels, so the fitted base_score is far from 0.5
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=len(X)), [0.8, 1.6][:n_classes - 1])
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return X, y
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_matches_xgboost(n_classes):
+    X, y = training_data(n_classes)
+    model = xgb.XGBClassifier(n_estimators=25, max_depth=4).fit(X, y)
+    trees = export_trees(model)
+    np.testing.assert_allclose(predict_proba(X, trees), model.predict_proba(X), atol=1e-5)
+    np.testing.assert_array_equal(predict(X, trees), model.predict(X))
+
+
+def test_batch_size_does_not_change_results():
+    X, y = training_data(3, seed=1)
+    trees = export_trees(xgb.XGBClassifier(n_estimators=10, max_depth=3).fit(X, y))
+    np.testing.assert_array_equal(predict_proba(X, trees, batch_size=7), predict_proba(X, trees))
+
+
+def test_shipped_arrays_match_the_pickled_model():
+    joblib = pytest.importorskip("joblib")
+    model = joblib.load("models/risk_classifier_model.pkl")
+    trees = load_trees()
+    X = np.random.default_rng(2).normal(0, 2, size=(2_000, len(trees["features"]))).astype(np.float32)
+    np.testing.assert_allclose(predict_proba(X, trees), model.predict_proba(X), atol=1e-5)
+
+
+def test_raw_vitals_match_the_training_features():
+    # classifier_inputs must reproduce enhance_features.py (scaled), including sbp < dbp rows
+    joblib = pytest.importorskip("joblib")
+    import pandas as pd
+    from enhance_features import engineer_features, numerical_cols
+    from scoring import load_scaler
+    from tree_model import classifier_inputs
+
+    model = joblib.load("models/risk_classifier_model.pkl")
+    trees = load_trees()
+    rng = np.random.default_rng(4)
+    n = 500
+    raw = pd.DataFrame({
+        "Body Height": rng.uniform(140, 200, n), "Body Weight": rng.uniform(40, 150, n),
+        "Diastolic Blood Pressure": rng.uniform(60, 120, n), "Systolic Blood Pressure": rng.uniform(50, 180, n),
+        "Heart rate": rng.uniform(45, 150, n), "Respiratory rate": rng.uniform(10, 30, n),
+        "Tobacco smoking status": rng.choice(["NO", "EX", "Smokes tobacco daily (finding)"], n),
+    })
+    assert (raw["Systolic Blood Pressure"] < raw["Diastolic Blood Pressure"]).sum() > 50
+    expected = engineer_features(raw)
+    expected[numerical_cols] = load_scaler().transform(expected[numerical_cols])
+    X_train = expected[list(trees["features"])].to_numpy(dtype=np.float32)
+
+    sc = raw["Tobacco smoking status"].map({"NO": 0, "EX": 1, "Smokes tobacco daily (finding)": 2})
+    X = classifier_inputs(*(raw[c] for c in raw.columns[:6]), sc, trees=trees)
+    np.testing.assert_allclose(X, X_train, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(predict_proba(X, trees), model.predict_proba(X_train), atol=1e-5)